@@ -0,0 +1,122 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+TOKEN_KEY = 'auth-token:{}'
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def get_shared_ttl():
+    """SHARED_TTL, если кэш по умолчанию общий для всех воркеров.
+
+    LocMemCache живёт в памяти одного процесса: сброс токена при
+    выходе дошёл бы только до воркера, обработавшего запрос, а в
+    остальных отозванный токен жил бы SHARED_TTL. С таким кэшем
+    используется только локальный LRU с коротким LOCAL_TTL.
+    """
+    if settings.CACHES['default']['BACKEND'] in PROCESS_LOCAL_CACHES:
+        return 0
+    return settings.TOKEN_AUTH_CACHE['SHARED_TTL']
+
+
+class TokenLRUCache:
+    """Ограниченный LRU-кэш токен → пользователь с временем жизни."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            user, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return user
+
+    def set(self, key, user):
+        with self._lock:
+            self._entries[key] = (user, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def delete_user(self, user_id):
+        with self._lock:
+            for key, (user, _) in list(self._entries.items()):
+                if user.id == user_id:
+                    del self._entries[key]
+
+
+token_cache = TokenLRUCache(
+    settings.TOKEN_AUTH_CACHE['LOCAL_SIZE'],
+    settings.TOKEN_AUTH_CACHE['LOCAL_TTL'],
+)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Аутентификация по токену без запроса к базе на каждый запрос.
+
+    Снимок пользователя хранится в LRU-кэше процесса и, если задан
+    SHARED_TTL и кэш общий для воркеров, в общем кэше. Записи
+    сбрасываются сигналами при удалении токена и сохранении
+    пользователя.
+    """
+
+    def authenticate_credentials(self, key):
+        user = token_cache.get(key)
+        if user is None:
+            user = self.get_shared(key)
+            if user is None:
+                user, _ = super().authenticate_credentials(key)
+                self.set_shared(key, user)
+            token_cache.set(key, user)
+        return copy.copy(user), Token(key=key, user=user)
+
+    def get_shared(self, key):
+        if not get_shared_ttl():
+            return None
+        return cache.get(TOKEN_KEY.format(key))
+
+    def set_shared(self, key, user):
+        timeout = get_shared_ttl()
+        if timeout:
+            cache.set(TOKEN_KEY.format(key), user, timeout)
+
+
+def invalidate_token(key):
+    token_cache.delete(key)
+    cache.delete(TOKEN_KEY.format(key))
+
+
+def invalidate_user_tokens(user_id):
+    token_cache.delete_user(user_id)
+    cache.delete_many([
+        TOKEN_KEY.format(key)
+        for key in Token.objects.filter(user_id=user_id).values_list(
+            'key', flat=True
+        )
+    ])
@@ -0,0 +1,51 @@
+from functools import wraps
+from hashlib import md5
+
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from recipes.versions import get_table_version
+
+RESPONSE_KEY = 'response:{}'
+RESPONSE_TIMEOUT = 60 * 60
+
+
+def versioned_cache(*models):
+    """Кэширует отрендеренный JSON-ответ до изменения таблиц моделей.
+
+    Ключ и ETag строятся из версий таблиц и пути запроса, поэтому
+    повторный запрос не обращается ни к базе, ни к сериализатору,
+    а запрос с совпавшим If-None-Match получает 304.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            renderer = request.accepted_renderer
+            if renderer.format != 'json':
+                return view(request, *args, **kwargs)
+            versions = ':'.join(
+                str(get_table_version(model)) for model in models
+            )
+            digest = md5(
+                f'{versions}:{request.get_full_path()}'.encode()
+            ).hexdigest()
+            etag = f'"{digest}"'
+            if etag in parse_etags(request.headers.get('If-None-Match', '')):
+                response = HttpResponseNotModified()
+                response['ETag'] = etag
+                return response
+            key = RESPONSE_KEY.format(digest)
+            content = cache.get(key)
+            if content is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                content = renderer.render(
+                    response.data, request.accepted_media_type
+                )
+                cache.set(key, content, RESPONSE_TIMEOUT)
+            response = HttpResponse(content, content_type=renderer.media_type)
+            response['ETag'] = etag
+            return response
+        return wrapper
+    return decorator
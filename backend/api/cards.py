@@ -0,0 +1,60 @@
+from django.core.cache import cache
+from django.db.models import Prefetch, prefetch_related_objects
+from recipes.models import Ingredient, RecipeIngredient, Tag
+from recipes.versions import get_table_version
+
+CARD_KEY = 'recipe-card:{}'
+CARD_TIMEOUT = 60 * 60
+CARD_PREFETCH = (
+    'author',
+    'tags',
+    Prefetch(
+        'recipe_ingredient_related',
+        queryset=RecipeIngredient.objects.select_related('ingredient')
+    ),
+)
+
+
+def get_card_stamp(request):
+    """Всё, кроме самого рецепта, от чего зависит карточка.
+
+    Карточка из кэша используется, только если совпадают адрес сайта
+    (в ней абсолютные ссылки) и версии таблиц тэгов и ингредиентов.
+    """
+    return (
+        request.build_absolute_uri('/'),
+        get_table_version(Tag),
+        get_table_version(Ingredient),
+    )
+
+
+def get_cards(recipes, stamp, render):
+    """Карточки рецептов без полей, зависящих от пользователя.
+
+    Карточки читаются из кэша одним get_many; недостающие
+    рендерятся функцией render после одной общей подгрузки
+    автора, тэгов и ингредиентов и сохраняются обратно.
+    """
+    keys = {recipe.id: CARD_KEY.format(recipe.id) for recipe in recipes}
+    cached = cache.get_many(keys.values())
+    cards = {}
+    missing = []
+    for recipe in recipes:
+        entry = cached.get(keys[recipe.id])
+        if entry is not None and entry[0] == stamp:
+            cards[recipe.id] = entry[1]
+        else:
+            missing.append(recipe)
+    if missing:
+        prefetch_related_objects(missing, *CARD_PREFETCH)
+        rendered = {recipe.id: dict(render(recipe)) for recipe in missing}
+        cache.set_many({
+            keys[recipe_id]: (stamp, card)
+            for recipe_id, card in rendered.items()
+        }, CARD_TIMEOUT)
+        cards.update(rendered)
+    return cards
+
+
+def invalidate_cards(recipe_ids):
+    cache.delete_many([CARD_KEY.format(recipe_id) for recipe_id in recipe_ids])
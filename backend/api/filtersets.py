@@ -1,10 +1,38 @@
+from django import forms
+from django.core.validators import validate_slug
+from django.db.models import Case, Exists, IntegerField, OuterRef, When
 from django_filters.rest_framework import FilterSet
-from django_filters.rest_framework.filters import (AllValuesMultipleFilter,
-                                                   BooleanFilter, CharFilter,
+from django_filters.rest_framework.filters import (BooleanFilter, CharFilter,
+                                                   ChoiceFilter, Filter,
                                                    ModelChoiceFilter)
 from recipes.models import Ingredient, Recipe
+from recipes.search import search_recipes, uses_search_vector
 from users.models import User
 
+from .utils.recipe_index import recipe_index
+
+TAGS_MATCH_ANY = 'any'
+TAGS_MATCH_ALL = 'all'
+
+
+class SlugListField(forms.Field):
+    """Список слагов из повторяющегося параметра запроса."""
+    widget = forms.MultipleHiddenInput
+
+    def to_python(self, value):
+        if not value:
+            return []
+        return list(dict.fromkeys(value))
+
+    def validate(self, value):
+        super().validate(value)
+        for slug in value:
+            validate_slug(slug)
+
+
+class SlugListFilter(Filter):
+    field_class = SlugListField
+
 
 class IngredientSearchFilter(FilterSet):
     """Фильтрсет ингредиентов."""
@@ -19,8 +47,49 @@ class RecipeSearchFilter(FilterSet):
     """Фильтрсет рецептов."""
     is_favorited = BooleanFilter(method='filter_is_favorited')
     is_in_shopping_cart = BooleanFilter(method='filter_is_in_shopping_cart')
-    tags = AllValuesMultipleFilter(field_name='tags__slug')
+    tags = SlugListFilter(method='filter_tags')
+    tags_match = ChoiceFilter(
+        choices=((TAGS_MATCH_ANY, 'Любой из тегов'),
+                 (TAGS_MATCH_ALL, 'Все теги')),
+        method='filter_tags_match'
+    )
     author = ModelChoiceFilter(queryset=User.objects.all())
+    search = CharFilter(method='filter_search')
+
+    def filter_search(self, queryset, name, value):
+        if not value.strip():
+            return queryset
+        if uses_search_vector():
+            return search_recipes(queryset, value)
+        recipe_ids = recipe_index.search(value)
+        if not recipe_ids:
+            return queryset.none()
+        return queryset.filter(pk__in=recipe_ids).order_by(Case(
+            *[
+                When(pk=recipe_id, then=position)
+                for position, recipe_id in enumerate(recipe_ids)
+            ],
+            output_field=IntegerField()
+        ))
+
+    def filter_tags(self, queryset, name, value):
+        if not value:
+            return queryset
+        recipe_tags = Recipe.tags.through.objects.filter(
+            recipe_id=OuterRef('pk')
+        )
+        if self.form.cleaned_data.get('tags_match') == TAGS_MATCH_ALL:
+            for slug in value:
+                queryset = queryset.filter(
+                    Exists(recipe_tags.filter(tag__slug=slug))
+                )
+            return queryset
+        return queryset.filter(
+            Exists(recipe_tags.filter(tag__slug__in=value))
+        )
+
+    def filter_tags_match(self, queryset, name, value):
+        return queryset
 
     def filter_is_favorited(self, queryset, name, value):
         user = self.request.user
@@ -37,8 +106,10 @@ class RecipeSearchFilter(FilterSet):
     class Meta:
         model = Recipe
         fields = [
-            'tags__slug',
+            'tags',
+            'tags_match',
             'author',
+            'search',
             'is_favorited',
             'is_in_shopping_cart'
         ]
@@ -0,0 +1,124 @@
+import heapq
+import time
+from bisect import bisect_left
+from threading import Lock
+
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+DURATION_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+SLOWEST_LIMIT = 5
+SQL_PREVIEW_LENGTH = 300
+
+
+class QueryRecorder:
+    """Обёртка connection.execute_wrapper, считающая запросы запроса.
+
+    Хранит количество запросов, суммарное время SQL и несколько
+    самых медленных выражений.
+    """
+
+    def __init__(self, slowest=SLOWEST_LIMIT):
+        self.count = 0
+        self.duration = 0.0
+        self.slowest_limit = slowest
+        self.slowest = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.count += 1
+            self.duration += duration
+            item = (duration, self.count, sql)
+            if len(self.slowest) < self.slowest_limit:
+                heapq.heappush(self.slowest, item)
+            elif duration > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, item)
+
+    def get_slowest(self):
+        return [
+            {'sql': sql[:SQL_PREVIEW_LENGTH], 'ms': round(duration * 1000, 3)}
+            for duration, _, sql in sorted(self.slowest, reverse=True)
+        ]
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин."""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def snapshot(self):
+        labels = [str(bound) for bound in self.bounds] + ['+Inf']
+        return {
+            'buckets': dict(zip(labels, self.counts)),
+            'sum': round(self.sum, 3),
+        }
+
+
+class RouteMetrics:
+    def __init__(self):
+        self.requests = 0
+        self.over_budget = 0
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.sql_ms = Histogram(DURATION_BUCKETS)
+        self.total_ms = Histogram(DURATION_BUCKETS)
+        self.slowest = []
+
+    def observe(self, recorder, total, over_budget):
+        self.requests += 1
+        self.over_budget += over_budget
+        self.queries.observe(recorder.count)
+        self.sql_ms.observe(recorder.duration * 1000)
+        self.total_ms.observe(total * 1000)
+        self.slowest = sorted(
+            self.slowest + recorder.get_slowest(),
+            key=lambda item: item['ms'],
+            reverse=True
+        )[:recorder.slowest_limit]
+
+    def snapshot(self):
+        return {
+            'requests': self.requests,
+            'over_budget': self.over_budget,
+            'queries': self.queries.snapshot(),
+            'sql_ms': self.sql_ms.snapshot(),
+            'total_ms': self.total_ms.snapshot(),
+            'slowest': self.slowest,
+        }
+
+
+class QueryMetrics:
+    """Агрегированные по маршрутам метрики SQL в памяти процесса."""
+
+    def __init__(self):
+        self._routes = {}
+        self._lock = Lock()
+
+    def observe(self, route, recorder, total, over_budget=False):
+        with self._lock:
+            metrics = self._routes.get(route)
+            if metrics is None:
+                metrics = self._routes[route] = RouteMetrics()
+            metrics.observe(recorder, total, over_budget)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                route: metrics.snapshot()
+                for route, metrics in sorted(self._routes.items())
+            }
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+
+query_metrics = QueryMetrics()
@@ -0,0 +1,95 @@
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from .metrics import SLOWEST_LIMIT, QueryRecorder, query_metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': True,
+    'DEFAULT_BUDGET': None,
+    'STRICT': False,
+    'SERVER_TIMING': True,
+    'SLOWEST': SLOWEST_LIMIT,
+}
+
+
+class QueryBudgetExceededError(Exception):
+    """Представление выполнило больше запросов, чем позволяет бюджет."""
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'QUERY_METRICS', {})}
+
+
+def get_budget(view_func, method, default=None):
+    """Бюджет запросов представления.
+
+    Берётся из атрибута query_budget класса представления: числом
+    для всех действий или словарём {действие: число}.
+    """
+    view_class = getattr(view_func, 'cls', None)
+    budget = getattr(view_class, 'query_budget', None)
+    if isinstance(budget, dict):
+        actions = getattr(view_func, 'actions', None) or {}
+        budget = budget.get(actions.get(method.lower()))
+    return default if budget is None else budget
+
+
+class QueryBudgetMiddleware:
+    """Считает SQL-запросы каждого запроса и проверяет бюджет.
+
+    Количество запросов и время SQL отдаются в заголовке Server-Timing
+    и копятся в гистограммах по маршрутам. При превышении бюджета
+    пишется предупреждение, а в строгом режиме (в тестах) поднимается
+    QueryBudgetExceededError. Запросы, выполненные при чтении
+    StreamingHttpResponse, не учитываются.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        config = get_config()
+        if not config['ENABLED']:
+            return self.get_response(request)
+        request._query_budget = config['DEFAULT_BUDGET']
+        recorder = QueryRecorder(slowest=config['SLOWEST'])
+        start = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+        budget = request._query_budget
+        over_budget = budget is not None and recorder.count > budget
+        match = request.resolver_match
+        if match is not None:
+            query_metrics.observe(
+                f'{request.method} {match.view_name}',
+                recorder, total, over_budget
+            )
+        if config['SERVER_TIMING']:
+            response['Server-Timing'] = (
+                f'db;dur={recorder.duration * 1000:.3f};'
+                f'desc="{recorder.count} queries", '
+                f'total;dur={total * 1000:.3f}'
+            )
+        if over_budget:
+            message = (
+                f'{request.method} {request.path}: {recorder.count} '
+                f'queries, budget {budget}'
+            )
+            logger.warning(
+                '%s. Slowest: %s', message, recorder.get_slowest()
+            )
+            if config['STRICT']:
+                raise QueryBudgetExceededError(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._query_budget = get_budget(
+            view_func, request.method,
+            getattr(request, '_query_budget', None)
+        )
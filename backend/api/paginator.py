@@ -1,6 +1,52 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 class SixPagination(PageNumberPagination):
     page_size = 6
     page_size_query_param = 'limit'
+
+
+class SixCursorPagination(CursorPagination):
+    """Постраничный вывод по курсору без OFFSET.
+
+    Общее количество объектов считается только по запросу
+    с параметром with_count=1.
+    """
+    page_size = 6
+    page_size_query_param = 'limit'
+    ordering = ('-pub_date', '-id')
+    count_query_param = 'with_count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        if request.query_params.get(self.count_query_param) in ('1', 'true'):
+            self.count = queryset.count()
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.count is not None:
+            response.data['count'] = self.count
+            response.data.move_to_end('count', last=False)
+        return response
+
+
+class UserCursorPagination(SixCursorPagination):
+    ordering = ('-id',)
+
+
+class CursorPaginationMixin:
+    """Переключает вьюсет на курсорную пагинацию по ?pagination=cursor."""
+    cursor_pagination_class = SixCursorPagination
+    pagination_query_param = 'pagination'
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if (
+                params.get(self.pagination_query_param) == 'cursor'
+                or self.cursor_pagination_class.cursor_query_param in params
+            ):
+                self._paginator = self.cursor_pagination_class()
+        return super().paginator
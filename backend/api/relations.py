@@ -0,0 +1,159 @@
+from django.db import connections, router, transaction
+from django.db.models.signals import post_delete, post_save
+from django.http import Http404
+from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
+
+
+def get_target_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise Http404
+
+
+def relation_error(message):
+    """Ошибка в том же виде, что отдавал validate() сериализатора."""
+    return ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [message]})
+
+
+def build_instance(model, pk, owner_field, owner_id, target_field,
+                   target_id, using):
+    instance = model(pk=pk, **{
+        model._meta.get_field(owner_field).attname: owner_id,
+        model._meta.get_field(target_field).attname: target_id,
+    })
+    instance._state.adding = False
+    instance._state.db = using
+    return instance
+
+
+def add_relation(model, owner_field, owner_id, target_field, target_id):
+    """Создаёт связь одним INSERT ... ON CONFLICT DO NOTHING.
+
+    Строка вставляется, только если цель существует, а такой связи
+    ещё нет. Возвращает созданный объект или None; для созданного
+    объекта отправляется post_save, как при обычном save().
+    """
+    using = router.db_for_write(model)
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    opts = model._meta
+    target = opts.get_field(target_field)
+    target_opts = target.related_model._meta
+    sql = (
+        f'INSERT INTO {quote(opts.db_table)} '
+        f'({quote(opts.get_field(owner_field).column)}, '
+        f'{quote(target.column)}) '
+        f'SELECT %s, {quote(target_opts.pk.column)} '
+        f'FROM {quote(target_opts.db_table)} '
+        f'WHERE {quote(target_opts.pk.column)} = %s '
+        f'ON CONFLICT DO NOTHING RETURNING {quote(opts.pk.column)}'
+    )
+    with transaction.atomic(using=using):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, (owner_id, target_id))
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        instance = build_instance(
+            model, row[0], owner_field, owner_id, target_field, target_id,
+            using
+        )
+        post_save.send(
+            sender=model, instance=instance, created=True,
+            update_fields=None, raw=False, using=using
+        )
+    return instance
+
+
+def remove_relation(model, owner_field, owner_id, target_field, target_id):
+    """Удаляет связь одним DELETE ... RETURNING.
+
+    Возвращает удалённый объект или None; для удалённого объекта
+    отправляется post_delete, как при обычном delete().
+    """
+    using = router.db_for_write(model)
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    opts = model._meta
+    sql = (
+        f'DELETE FROM {quote(opts.db_table)} '
+        f'WHERE {quote(opts.get_field(owner_field).column)} = %s '
+        f'AND {quote(opts.get_field(target_field).column)} = %s '
+        f'RETURNING {quote(opts.pk.column)}'
+    )
+    with transaction.atomic(using=using):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, (owner_id, target_id))
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        instance = build_instance(
+            model, row[0], owner_field, owner_id, target_field, target_id,
+            using
+        )
+        post_delete.send(sender=model, instance=instance, using=using)
+    return instance
+
+
+def placeholders(values):
+    return ', '.join(['%s'] * len(values))
+
+
+def add_relations(model, owner_field, owner_id, target_field, target_ids):
+    """Создаёт связи со всеми существующими целями одним INSERT.
+
+    Возвращает множество id целей, для которых связь создана.
+    Сигналы не отправляются: вызывающий код сообщает об изменении
+    одним relations_changed.
+    """
+    if not target_ids:
+        return set()
+    using = router.db_for_write(model)
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    opts = model._meta
+    target = opts.get_field(target_field)
+    target_opts = target.related_model._meta
+    target_ids = list(target_ids)
+    sql = (
+        f'INSERT INTO {quote(opts.db_table)} '
+        f'({quote(opts.get_field(owner_field).column)}, '
+        f'{quote(target.column)}) '
+        f'SELECT %s, {quote(target_opts.pk.column)} '
+        f'FROM {quote(target_opts.db_table)} '
+        f'WHERE {quote(target_opts.pk.column)} '
+        f'IN ({placeholders(target_ids)}) '
+        f'ON CONFLICT DO NOTHING RETURNING {quote(target.column)}'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, (owner_id, *target_ids))
+        return {row[0] for row in cursor.fetchall()}
+
+
+def remove_relations(model, owner_field, owner_id, target_field,
+                     target_ids=None):
+    """Удаляет связи одним DELETE и возвращает id их целей.
+
+    Если target_ids равен None, удаляются все связи владельца.
+    """
+    if target_ids is not None and not target_ids:
+        return set()
+    using = router.db_for_write(model)
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    opts = model._meta
+    target_column = quote(opts.get_field(target_field).column)
+    sql = (
+        f'DELETE FROM {quote(opts.db_table)} '
+        f'WHERE {quote(opts.get_field(owner_field).column)} = %s'
+    )
+    params = [owner_id]
+    if target_ids is not None:
+        target_ids = list(target_ids)
+        sql += f' AND {target_column} IN ({placeholders(target_ids)})'
+        params.extend(target_ids)
+    with connection.cursor() as cursor:
+        cursor.execute(f'{sql} RETURNING {target_column}', params)
+        return {row[0] for row in cursor.fetchall()}
@@ -1,19 +1,29 @@
-from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
-                            ShoppingCart, Tag)
+from django.db import models, transaction
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from recipes.shopping_list import recipe_changed
 from rest_framework import serializers
 from users.serializers import UserSerializer
 
+from .cards import get_card_stamp, get_cards
 from .utils.base64 import Base64ImageField
-from .utils.hex import Hex2NameColor
+from .utils.hex import ColorNameField, HexColorField
+from .utils.images import ImageVariantsField
+from .viewer import get_viewer
+
+MAX_BULK_RECIPES = 100
+BULK_ADD = 'add'
+BULK_REMOVE = 'remove'
+BULK_REPLACE = 'replace'
 
 
 class TagSerializer(serializers.ModelSerializer):
     """Сериализатор тэгов."""
-    color = Hex2NameColor()
+    color = HexColorField()
+    color_name = ColorNameField(source='color')
 
     class Meta:
         model = Tag
-        fields = ('id', 'name', 'color', 'slug')
+        fields = ('id', 'name', 'color', 'color_name', 'slug')
 
     def __str__(self):
         return self.name
@@ -41,26 +51,34 @@ class WriteRecipeIngredienSerializer(serializers.ModelSerializer):
 
 class ReadRecipeIngredienSerializer(serializers.ModelSerializer):
     """Сериализатор отображения ингредиентов в рецепте."""
-    id = serializers.SerializerMethodField()
-    name = serializers.SerializerMethodField()
-    measurement_unit = serializers.SerializerMethodField()
+    id = serializers.ReadOnlyField(source='ingredient.id')
+    name = serializers.ReadOnlyField(source='ingredient.name')
+    measurement_unit = serializers.ReadOnlyField(
+        source='ingredient.measurement_unit'
+    )
 
     class Meta:
         model = RecipeIngredient
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
-    def get_id(self, obj):
-        return obj.ingredient.id
 
-    def get_name(self, obj):
-        return obj.ingredient.name
+class RecipeCardListSerializer(serializers.ListSerializer):
+    """Загружает карточки всех рецептов страницы одним обращением."""
 
-    def get_measurement_unit(self, obj):
-        return obj.ingredient.measurement_unit
+    def to_representation(self, data):
+        recipes = list(
+            data.all() if isinstance(data, models.Manager) else data
+        )
+        self.child.load_cards(recipes)
+        return [self.child.to_representation(recipe) for recipe in recipes]
 
 
 class RecipeViewSerializer(serializers.ModelSerializer):
-    """Сериализатор просмотра рецептов."""
+    """Сериализатор просмотра рецептов.
+
+    Общая для всех пользователей часть ответа берётся из кэша
+    карточек, флаги текущего пользователя добавляются при выдаче.
+    """
     author = UserSerializer(read_only=True)
     tags = TagSerializer(many=True, read_only=True)
     ingredients = ReadRecipeIngredienSerializer(
@@ -70,32 +88,48 @@ class RecipeViewSerializer(serializers.ModelSerializer):
     )
     is_in_shopping_cart = serializers.SerializerMethodField()
     is_favorited = serializers.SerializerMethodField()
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Recipe
-        fields = '__all__'
+        exclude = ('favorites_count', 'in_cart_count', 'search_vector')
+        list_serializer_class = RecipeCardListSerializer
 
     def __str__(self):
         return self.name
 
+    def load_cards(self, recipes):
+        self._cards = get_cards(
+            recipes, get_card_stamp(self.context['request']), self.render_card
+        )
+
+    def render_card(self, instance):
+        return super().to_representation(instance)
+
+    def to_representation(self, instance):
+        cards = getattr(self, '_cards', {})
+        if instance.id not in cards:
+            self.load_cards([instance])
+            cards = self._cards
+        card = cards[instance.id]
+        viewer = get_viewer(self.context['request'])
+        return {
+            **card,
+            'author': {
+                **card['author'],
+                'is_subscribed': viewer.is_subscribed(card['author']['id']),
+            },
+            'is_in_shopping_cart': viewer.is_in_shopping_cart(instance.id),
+            'is_favorited': viewer.is_favorited(instance.id),
+        }
+
     def get_is_favorited(self, obj):
-        user = self.context['request'].user
-        if user.is_anonymous:
-            return False
-        return Favorite.objects.filter(
-            author=user,
-            recipe=obj
-        ).exists()
+        return get_viewer(self.context['request']).is_favorited(obj.id)
 
     def get_is_in_shopping_cart(self, obj):
-        request = self.context.get('request')
-        if request.user.is_anonymous:
-            return False
-        if ShoppingCart.objects.filter(
-            author=request.user, recipe=obj
-        ).exists():
-            return True
-        return False
+        return get_viewer(
+            self.context['request']
+        ).is_in_shopping_cart(obj.id)
 
 
 class RecipeWriteSerializer(serializers.ModelSerializer):
@@ -114,6 +148,20 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
             'name', 'text', 'cooking_time'
         )
 
+    def validate_ingredients(self, ingredients):
+        ingredient_ids = [ingredient['id'] for ingredient in ingredients]
+        if len(ingredient_ids) != len(set(ingredient_ids)):
+            raise serializers.ValidationError(
+                'Ингредиенты в рецепте не должны повторяться.')
+        missing = set(ingredient_ids) - set(
+            Ingredient.objects.in_bulk(ingredient_ids)
+        )
+        if missing:
+            raise serializers.ValidationError(
+                f'Ингредиенты не найдены: {sorted(missing)}.')
+        return ingredients
+
+    @transaction.atomic
     def create(self, validated_data):
         recipe = Recipe.objects.create(
             author=self.context.get('request').user,
@@ -125,14 +173,17 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
         recipe.tags.set(tags)
-        for ingredient in ingredients:
-            RecipeIngredient.objects.create(
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
                 ingredient_id=ingredient['id'],
                 amount=ingredient['amount'],
                 recipe=recipe
             )
+            for ingredient in ingredients
+        )
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         instance.name = validated_data.get('name', instance.name)
         instance.image = validated_data.get('image', instance.image)
@@ -140,76 +191,76 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         instance.cooking_time = validated_data.get(
             'cooking_time', instance.cooking_time
         )
-        ingredients = validated_data.pop('ingredients')
-        tags = validated_data.pop('tags')
-        instance.tags.set(tags)
-        RecipeIngredient.objects.filter(recipe=instance).all().delete()
-        for ingredient in ingredients:
-            amount = ingredient['amount']
-            ingredient_id = ingredient['id']
-            RecipeIngredient.objects.create(
-                ingredient=Ingredient.objects.get(id=ingredient_id),
-                amount=amount,
-                recipe=instance
-            )
+        ingredients = validated_data.pop('ingredients', None)
+        tags = validated_data.pop('tags', None)
+        if tags is not None:
+            instance.tags.set(tags)
+        if ingredients is not None:
+            changed = self.update_ingredients(instance, ingredients)
+            if changed:
+                recipe_changed(instance.pk, changed)
         instance.save()
         return instance
 
-
-class ShoppingCartSerializer(serializers.ModelSerializer):
-    """Сериализатор списка покупок."""
-    class Meta:
-        model = ShoppingCart
-        fields = ('author', 'recipe')
-
-    def validate(self, data):
-        author = data['author']
-        recipe = data['recipe']
-        action = self.context['action']
-        recipe_in_sh_cart = ShoppingCart.objects.filter(
-            recipe=recipe,
-            author=author
+    def update_ingredients(self, recipe, ingredients):
+        """Приводит ингредиенты рецепта к новому списку.
+
+        Неизменённые строки не перезаписываются: удаляются лишние,
+        обновляются изменившиеся количества, добавляются новые.
+        Возвращает id добавленных и изменённых ингредиентов: удалённые
+        строки пересчитывает сигнал post_delete RecipeIngredient.
+        """
+        current = {
+            item.ingredient_id: item
+            for item in recipe.recipe_ingredient_related.all()
+        }
+        amounts = {
+            ingredient['id']: ingredient['amount']
+            for ingredient in ingredients
+        }
+        removed = current.keys() - amounts.keys()
+        if removed:
+            RecipeIngredient.objects.filter(
+                recipe=recipe, ingredient_id__in=removed
+            ).delete()
+        changed = []
+        for ingredient_id, item in current.items():
+            amount = amounts.get(ingredient_id)
+            if amount is not None and item.amount != amount:
+                item.amount = amount
+                changed.append(item)
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ('amount',))
+        added = amounts.keys() - current.keys()
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                ingredient_id=ingredient_id,
+                amount=amounts[ingredient_id],
+                recipe=recipe
+            )
+            for ingredient_id in added
         )
-        if action == 'remove':
-            if not recipe_in_sh_cart:
-                raise serializers.ValidationError(
-                    detail='Данного рецепта нет в списке покупок.')
-            recipe_in_sh_cart.delete()
-        elif action == 'add':
-            if recipe_in_sh_cart:
-                raise serializers.ValidationError(
-                    detail='Рецепт уже добавлен в список покупок.')
-        return data
+        return added | {item.ingredient_id for item in changed}
 
 
 class RecipeInListSerializer(serializers.ModelSerializer):
     """Сериализатор рецептов в списке."""
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_variants', 'cooking_time')
 
 
-class FavoriteSerializer(RecipeInListSerializer):
-    """Сериализатор избранных рецептов."""
-    class Meta:
-        model = Favorite
-        fields = ('author', 'recipe')
-
-    def validate(self, data):
-        author = data['author']
-        recipe = data['recipe']
-        action = self.context['action']
-        recipe_in_favorites = Favorite.objects.filter(
-            recipe=recipe,
-            author=author
-        )
-        if action == 'remove':
-            if not recipe_in_favorites:
-                raise serializers.ValidationError(
-                    detail='Данного рецепта нет в избранном.')
-            recipe_in_favorites.delete()
-        elif action == 'add':
-            if recipe_in_favorites:
-                raise serializers.ValidationError(
-                    detail='Рецепт уже добавлен в избранное.')
-        return data
+class RecipeListBulkSerializer(serializers.Serializer):
+    """Сериализатор массового изменения избранного и списка покупок."""
+    action = serializers.ChoiceField(
+        choices=(BULK_ADD, BULK_REMOVE, BULK_REPLACE)
+    )
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        max_length=MAX_BULK_RECIPES
+    )
+
+    def validate_recipes(self, recipes):
+        return list(dict.fromkeys(recipes))
@@ -0,0 +1,92 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from recipes.models import Favorite, Recipe, RecipeIngredient, ShoppingCart
+from recipes.signals import relations_changed
+from rest_framework.authtoken.models import Token
+from users.models import Follow, User
+
+from .authentication import invalidate_token, invalidate_user_tokens
+from .cards import invalidate_cards
+from .utils.images import schedule_variants
+from .viewer import invalidate_viewer
+
+
+@receiver([post_save, post_delete], sender=Favorite)
+@receiver([post_save, post_delete], sender=ShoppingCart)
+def invalidate_recipe_relations(sender, instance, **kwargs):
+    transaction.on_commit(
+        partial(invalidate_viewer, instance.author_id, sender)
+    )
+
+
+@receiver(relations_changed, sender=Favorite)
+@receiver(relations_changed, sender=ShoppingCart)
+def invalidate_changed_relations(sender, author_id, **kwargs):
+    transaction.on_commit(partial(invalidate_viewer, author_id, sender))
+
+
+@receiver([post_save, post_delete], sender=Follow)
+def invalidate_following(sender, instance, **kwargs):
+    transaction.on_commit(
+        partial(invalidate_viewer, instance.user_id, sender)
+    )
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+def invalidate_saved_user_tokens(sender, instance, created,
+                                 update_fields=None, **kwargs):
+    if created or update_fields == frozenset(('last_login',)):
+        return
+    invalidate_user_tokens(instance.id)
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_cards(sender, instance, created, update_fields=None,
+                            raw=False, **kwargs):
+    if created or raw or update_fields == frozenset(('last_login',)):
+        return
+    recipe_ids = list(instance.recipes.values_list('id', flat=True))
+    if recipe_ids:
+        transaction.on_commit(partial(invalidate_cards, recipe_ids))
+
+
+@receiver([post_save, post_delete], sender=Recipe)
+def invalidate_recipe_card(sender, instance, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(partial(invalidate_cards, [instance.pk]))
+
+
+@receiver([post_save, post_delete], sender=RecipeIngredient)
+def invalidate_ingredient_card(sender, instance, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(
+            partial(invalidate_cards, [instance.recipe_id])
+        )
+
+
+def get_image_name(instance):
+    # Не обращается к дескриптору: отложенное поле не загружается.
+    value = instance.__dict__.get('image')
+    return getattr(value, 'name', value)
+
+
+@receiver(post_init, sender=Recipe)
+def remember_image(sender, instance, **kwargs):
+    instance._saved_image = get_image_name(instance)
+
+
+@receiver(post_save, sender=Recipe)
+def create_image_variants(sender, instance, created, raw=False, **kwargs):
+    name = get_image_name(instance)
+    changed = created or name != instance._saved_image
+    instance._saved_image = name
+    if name and changed and not raw:
+        schedule_variants(name, partial(invalidate_cards, [instance.pk]))
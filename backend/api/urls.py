@@ -13,5 +13,6 @@ router.register('recipes', views.RecipeViewSet, basename='recipes')
 
 
 urlpatterns = [
+    path('metrics/queries/', views.QueryMetricsView.as_view(), name='metrics'),
     path('', include(router.urls)),
 ]
@@ -1,13 +1,56 @@
 import base64
+import binascii
+import hashlib
+from tempfile import SpooledTemporaryFile
 
-from django.core.files.base import ContentFile
+from django.core.files import File
+from django.core.files.storage import default_storage
 from rest_framework import serializers
 
+MAX_IMAGE_SIZE = 10 * 1024 * 1024
+DECODE_CHUNK_SIZE = 64 * 1024
+SPOOL_MAX_SIZE = 1024 * 1024
+IMAGE_DIR = 'recipes'
+
 
 class Base64ImageField(serializers.ImageField):
+    """Изображение в data URL.
+
+    Base64 декодируется частями во временный файл с одновременным
+    подсчётом sha256, файл сохраняется под именем-хэшем. Если такое
+    изображение уже загружено, возвращается имя существующего файла.
+    """
+    default_error_messages = {
+        'too_large': 'Размер изображения больше {max_size} байт.',
+        'invalid_base64': 'Изображение должно быть в формате base64.',
+    }
+
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith('data:image'):
-            format, imgstr = data.split(';base64,')
+            format, _, imgstr = data.partition(';base64,')
             ext = format.split('/')[-1]
-            data = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
+            content, digest = self.decode(imgstr)
+            name = f'{IMAGE_DIR}/{digest}.{ext}'
+            if default_storage.exists(name):
+                content.close()
+                return name
+            data = File(content, name=name)
         return super().to_internal_value(data)
+
+    def decode(self, imgstr):
+        if len(imgstr) // 4 * 3 > MAX_IMAGE_SIZE:
+            self.fail('too_large', max_size=MAX_IMAGE_SIZE)
+        digest = hashlib.sha256()
+        content = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        try:
+            for start in range(0, len(imgstr), DECODE_CHUNK_SIZE):
+                chunk = base64.b64decode(
+                    imgstr[start:start + DECODE_CHUNK_SIZE], validate=True
+                )
+                digest.update(chunk)
+                content.write(chunk)
+        except (binascii.Error, ValueError):
+            content.close()
+            self.fail('invalid_base64')
+        content.seek(0)
+        return content, digest.hexdigest()
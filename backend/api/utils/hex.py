@@ -1,14 +1,49 @@
+import re
+
 import webcolors
 from rest_framework import serializers
 
+HEX_COLOR_RE = re.compile(r'#(?:[0-9a-f]{3}){1,2}')
+NAME_TO_HEX = dict(webcolors.CSS3_NAMES_TO_HEX)
+HEX_TO_NAME = dict(webcolors.CSS3_HEX_TO_NAMES)
+
+
+def normalize_color(value):
+    """Приводит имя цвета или HEX-код к виду #rrggbb."""
+    value = value.strip().lower()
+    if value in NAME_TO_HEX:
+        return NAME_TO_HEX[value]
+    if not HEX_COLOR_RE.fullmatch(value):
+        raise ValueError(value)
+    if len(value) == 4:
+        value = '#' + ''.join(digit * 2 for digit in value[1:])
+    return value
+
+
+class HexColorField(serializers.Field):
+    """Цвет в виде HEX-кода; на вход принимает также имя CSS-цвета."""
+    default_error_messages = {
+        'invalid': 'Укажите HEX-код (#rrggbb) или имя CSS-цвета.',
+    }
 
-class Hex2NameColor(serializers.Field):
     def to_representation(self, value):
         return value
 
     def to_internal_value(self, data):
+        if not isinstance(data, str):
+            self.fail('invalid')
         try:
-            data = webcolors.hex_to_name(data)
+            return normalize_color(data)
         except ValueError:
-            raise serializers.ValidationError('Для этого цвета нет имени')
-        return webcolors.hex_to_name(data)
+            self.fail('invalid')
+
+
+class ColorNameField(serializers.Field):
+    """Имя CSS-цвета по HEX-коду или None, если имени нет."""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return HEX_TO_NAME.get(value)
@@ -0,0 +1,134 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+VARIANTS_DIR = 'variants'
+VARIANTS = {
+    'thumbnail': (480, 480),
+    'medium': (1200, 1200),
+}
+VARIANT_FORMAT = 'webp'
+
+executor = ThreadPoolExecutor(
+    max_workers=2, thread_name_prefix='image-variants'
+)
+# Имя изображения → callback-и задания, которое уже в пуле.
+pending_jobs = {}
+pending_lock = threading.Lock()
+
+
+def variant_name(name, variant):
+    stem = PurePosixPath(name).stem
+    return f'{VARIANTS_DIR}/{stem}_{variant}.{VARIANT_FORMAT}'
+
+
+def save_variant(target, content):
+    """Сохраняет копию под точным именем.
+
+    Если копию успел сохранить другой процесс, хранилище дало бы
+    файлу новое имя; такой дубликат сразу удаляется.
+    """
+    saved = default_storage.save(target, ContentFile(content))
+    if saved != target:
+        default_storage.delete(saved)
+
+
+def generate_variants(name):
+    """Создаёт уменьшенные WebP-копии изображения.
+
+    Возвращает True, если хотя бы одна копия создана.
+    """
+    missing = {
+        variant: size for variant, size in VARIANTS.items()
+        if not default_storage.exists(variant_name(name, variant))
+    }
+    if not missing:
+        return False
+    try:
+        with default_storage.open(name) as file:
+            image = Image.open(file)
+            image.load()
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+        for variant, size in missing.items():
+            resized = image.copy()
+            resized.thumbnail(size)
+            buffer = BytesIO()
+            resized.save(buffer, format=VARIANT_FORMAT)
+            save_variant(variant_name(name, variant), buffer.getvalue())
+    except Exception:
+        logger.exception('Не удалось создать копии изображения %s', name)
+        return False
+    return True
+
+
+def run_variants(name):
+    try:
+        generated = generate_variants(name)
+    finally:
+        with pending_lock:
+            callbacks = pending_jobs.pop(name, [])
+    if generated:
+        for callback in callbacks:
+            callback()
+
+
+def submit_variants(name, callback=None):
+    """Ставит задание в пул, если для изображения его ещё нет.
+
+    Одно изображение может быть у многих рецептов; повторные
+    запросы только добавляют свой callback к уже поставленному
+    заданию, и он вызывается, когда копии созданы.
+    """
+    with pending_lock:
+        callbacks = pending_jobs.get(name)
+        if callbacks is None:
+            callbacks = pending_jobs[name] = []
+            submit = True
+        else:
+            submit = False
+        if callback is not None:
+            callbacks.append(callback)
+    if submit:
+        executor.submit(run_variants, name)
+
+
+def schedule_variants(name, callback=None):
+    """Ставит создание копий в фоновый пул после коммита транзакции."""
+    transaction.on_commit(lambda: submit_variants(name, callback))
+
+
+def get_variant_urls(name, request=None):
+    urls = {}
+    for variant in VARIANTS:
+        target = variant_name(name, variant)
+        if default_storage.exists(target):
+            url = default_storage.url(target)
+            urls[variant] = (
+                request.build_absolute_uri(url) if request else url
+            )
+    return urls
+
+
+class ImageVariantsField(serializers.Field):
+    """Ссылки на уже созданные копии изображения."""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        kwargs.setdefault('source', 'image')
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value:
+            return {}
+        return get_variant_urls(value.name, self.context.get('request'))
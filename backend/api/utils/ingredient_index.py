@@ -0,0 +1,132 @@
+import re
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+from recipes.models import Ingredient
+from recipes.versions import get_table_version
+
+SEARCH_LIMIT = 20
+SIMILARITY_THRESHOLD = 0.3
+WORD_RE = re.compile(r'\w+')
+
+
+def get_trigrams(text):
+    """Триграммы слов строки, как их считает pg_trgm."""
+    trigrams = set()
+    for word in WORD_RE.findall(text.lower()):
+        word = f'  {word} '
+        trigrams.update(
+            word[position:position + 3]
+            for position in range(len(word) - 2)
+        )
+    return trigrams
+
+
+def edit_distance(first, second, limit):
+    """Расстояние Левенштейна; всё, что больше limit, — это limit + 1."""
+    if abs(len(first) - len(second)) > limit:
+        return limit + 1
+    previous = list(range(len(second) + 1))
+    for row, first_char in enumerate(first, 1):
+        current = [row]
+        for column, second_char in enumerate(second, 1):
+            current.append(min(
+                previous[column] + 1,
+                current[column - 1] + 1,
+                previous[column - 1] + (first_char != second_char),
+            ))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return min(previous[-1], limit + 1)
+
+
+def allowed_edits(query):
+    """Допустимое число опечаток: одна на каждые три буквы запроса."""
+    return len(query) // 3
+
+
+class IngredientIndex:
+    """Отсортированный индекс ингредиентов в памяти процесса.
+
+    Строится при первом обращении и перестраивается, когда меняется
+    версия таблицы ингредиентов. Поиск отдаёт сначала ингредиенты,
+    начинающиеся с запроса, затем содержащие его, а если их меньше
+    лимита — похожие (опечатки). Кандидаты на похожесть берутся из
+    триграммного индекса; подходят те, у кого сходство триграмм не
+    ниже порога или одно из слов отличается от запроса не больше чем
+    на allowed_edits правок: у коротких слов вроде «малако» и «молоко»
+    слишком мало общих триграмм.
+    """
+
+    def __init__(self):
+        self._index = (None, (), (), {}, ())
+
+    def build(self, version):
+        items = sorted(
+            Ingredient.objects.values('id', 'name', 'measurement_unit'),
+            key=lambda item: (item['name'].lower(), item['id'])
+        )
+        keys = [item['name'].lower() for item in items]
+        postings = defaultdict(list)
+        sizes = []
+        for position, key in enumerate(keys):
+            trigrams = get_trigrams(key)
+            sizes.append(len(trigrams))
+            for trigram in trigrams:
+                postings[trigram].append(position)
+        self._index = (version, keys, items, dict(postings), sizes)
+        return self._index
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        version = get_table_version(Ingredient)
+        index = self._index
+        if index[0] != version:
+            index = self.build(version)
+        _, keys, items, postings, sizes = index
+        query = query.lower()
+        results = []
+        position = bisect_left(keys, query)
+        while (
+            position < len(keys)
+            and len(results) < limit
+            and keys[position].startswith(query)
+        ):
+            results.append(items[position])
+            position += 1
+        if len(results) < limit:
+            for key, item in zip(keys, items):
+                if query in key and not key.startswith(query):
+                    results.append(item)
+                    if len(results) == limit:
+                        break
+        if len(results) < limit:
+            found = {item['id'] for item in results}
+            results.extend(self.similar(
+                query, found, limit - len(results), index
+            ))
+        return results
+
+    def similar(self, query, exclude, limit, index):
+        _, keys, items, postings, sizes = index
+        trigrams = get_trigrams(query)
+        shared = Counter()
+        for trigram in trigrams:
+            shared.update(postings.get(trigram, ()))
+        edits = allowed_edits(query)
+        ranked = []
+        for position, count in shared.items():
+            if items[position]['id'] in exclude:
+                continue
+            similarity = count / (len(trigrams) + sizes[position] - count)
+            distance = min(
+                edit_distance(query, word, edits)
+                for word in [keys[position], *WORD_RE.findall(keys[position])]
+            )
+            if similarity >= SIMILARITY_THRESHOLD or distance <= edits:
+                ranked.append((distance, -similarity, position))
+        ranked.sort()
+        return [items[position] for _, _, position in ranked[:limit]]
+
+
+ingredient_index = IngredientIndex()
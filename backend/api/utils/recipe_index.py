@@ -0,0 +1,86 @@
+import re
+from bisect import bisect_left
+from collections import defaultdict
+
+from recipes.models import Recipe, RecipeIngredient
+from recipes.versions import get_table_version
+
+TOKEN_RE = re.compile(r'\w+')
+NAME_WEIGHT = 4
+INGREDIENT_WEIGHT = 2
+TEXT_WEIGHT = 1
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+class RecipeIndex:
+    """Обратный индекс рецептов в памяти процесса.
+
+    Запасной вариант полнотекстового поиска для баз без tsvector.
+    Перестраивается при изменении версии таблицы рецептов. Каждое
+    слово запроса сопоставляется как префикс слов названия,
+    ингредиентов и текста; рецепт должен содержать все слова запроса.
+    """
+
+    def __init__(self):
+        self._index = (None, (), ())
+
+    def build(self, version):
+        postings = defaultdict(lambda: defaultdict(int))
+        fields = Recipe.objects.values_list('id', 'name', 'text')
+        for recipe_id, name, text in fields:
+            for token in tokenize(name):
+                postings[token][recipe_id] += NAME_WEIGHT
+            for token in tokenize(text):
+                postings[token][recipe_id] += TEXT_WEIGHT
+        ingredients = RecipeIngredient.objects.values_list(
+            'recipe_id', 'ingredient__name'
+        )
+        for recipe_id, name in ingredients:
+            for token in tokenize(name):
+                postings[token][recipe_id] += INGREDIENT_WEIGHT
+        tokens = sorted(postings)
+        self._index = (
+            version, tokens, [dict(postings[token]) for token in tokens]
+        )
+        return self._index
+
+    def match(self, tokens, postings, term):
+        scores = defaultdict(int)
+        position = bisect_left(tokens, term)
+        while position < len(tokens) and tokens[position].startswith(term):
+            for recipe_id, weight in postings[position].items():
+                scores[recipe_id] += weight
+            position += 1
+        return scores
+
+    def search(self, query):
+        """Возвращает id рецептов по убыванию релевантности."""
+        version = get_table_version(Recipe)
+        index = self._index
+        if index[0] != version:
+            index = self.build(version)
+        _, tokens, postings = index
+        scores = None
+        for term in dict.fromkeys(tokenize(query)):
+            matched = self.match(tokens, postings, term)
+            if scores is None:
+                scores = matched
+            else:
+                scores = {
+                    recipe_id: score + matched[recipe_id]
+                    for recipe_id, score in scores.items()
+                    if recipe_id in matched
+                }
+            if not scores:
+                return []
+        if scores is None:
+            return []
+        return sorted(scores, key=lambda recipe_id: (
+            -scores[recipe_id], -recipe_id
+        ))
+
+
+recipe_index = RecipeIndex()
@@ -0,0 +1,59 @@
+import csv
+import json
+from itertools import islice
+
+CHUNK_SIZE = 500
+
+
+class Echo:
+    """Псевдобуфер для csv.writer: возвращает строку вместо записи."""
+    def write(self, value):
+        return value
+
+
+def chunked(parts, size=CHUNK_SIZE):
+    """Склеивает строки пачками, чтобы не отдавать по одной строке."""
+    parts = iter(parts)
+    while True:
+        chunk = ''.join(islice(parts, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def render_txt(lines):
+    yield 'Список покупок:\n'
+    for number, (name, unit, amount) in enumerate(lines, start=1):
+        yield f'{number}. {name} ({unit}) — {amount}\n'
+
+
+def render_csv(lines):
+    writer = csv.writer(Echo())
+    yield writer.writerow(('name', 'measurement_unit', 'amount'))
+    for line in lines:
+        yield writer.writerow(line)
+
+
+def render_json(lines):
+    yield '['
+    separator = ''
+    for name, unit, amount in lines:
+        yield separator + json.dumps(
+            {'name': name, 'measurement_unit': unit, 'amount': amount},
+            ensure_ascii=False
+        )
+        separator = ', '
+    yield ']'
+
+
+SHOPPING_LIST_FORMATS = {
+    'txt': (render_txt, 'text/plain; charset=utf-8'),
+    'csv': (render_csv, 'text/csv; charset=utf-8'),
+    'json': (render_json, 'application/json; charset=utf-8'),
+}
+
+
+def render_shopping_list(lines, file_format):
+    """Возвращает генератор содержимого файла и его content-type."""
+    renderer, content_type = SHOPPING_LIST_FORMATS[file_format]
+    return chunked(renderer(lines)), content_type
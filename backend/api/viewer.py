@@ -0,0 +1,67 @@
+from django.core.cache import cache
+from recipes.models import Favorite, ShoppingCart
+from users.models import Follow
+
+VIEWER_KEY = 'viewer:{}:{}'
+VIEWER_TIMEOUT = 60 * 10
+
+VIEWER_RELATIONS = {
+    'following': (Follow, 'user', 'author_id'),
+    'favorites': (Favorite, 'author', 'recipe_id'),
+    'shopping_cart': (ShoppingCart, 'author', 'recipe_id'),
+}
+RELATION_NAMES = {
+    model: name for name, (model, _, _) in VIEWER_RELATIONS.items()
+}
+
+
+class Viewer:
+    """Связи текущего пользователя, загружаемые один раз за запрос.
+
+    Каждое множество id читается из общего кэша, а при промахе —
+    одним запросом к базе. Кэш сбрасывается сигналами после коммита
+    изменений подписок, избранного и списка покупок: иначе запрос,
+    пришедший до коммита, снова закэшировал бы старое множество.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self._relations = {}
+
+    def get_ids(self, name):
+        if name not in self._relations:
+            self._relations[name] = self.load_ids(name)
+        return self._relations[name]
+
+    def load_ids(self, name):
+        if self.user.is_anonymous:
+            return frozenset()
+        key = VIEWER_KEY.format(self.user.id, name)
+        ids = cache.get(key)
+        if ids is None:
+            model, user_field, id_field = VIEWER_RELATIONS[name]
+            ids = frozenset(model.objects.filter(
+                **{user_field: self.user}
+            ).values_list(id_field, flat=True))
+            cache.set(key, ids, VIEWER_TIMEOUT)
+        return ids
+
+    def is_subscribed(self, author_id):
+        return author_id in self.get_ids('following')
+
+    def is_favorited(self, recipe_id):
+        return recipe_id in self.get_ids('favorites')
+
+    def is_in_shopping_cart(self, recipe_id):
+        return recipe_id in self.get_ids('shopping_cart')
+
+
+def get_viewer(request):
+    viewer = getattr(request, '_viewer', None)
+    if viewer is None:
+        viewer = request._viewer = Viewer(request.user)
+    return viewer
+
+
+def invalidate_viewer(user_id, model):
+    cache.delete(VIEWER_KEY.format(user_id, RELATION_NAMES[model]))
@@ -1,75 +1,213 @@
-from django.db.models import Sum
-from django.http import HttpResponse
-from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.db.models import F
+from django.http import Http404, StreamingHttpResponse
+from django.utils.decorators import method_decorator
 from django_filters.rest_framework import DjangoFilterBackend
-from recipes.models import Ingredient, Recipe, Tag
+from recipes.feed import fan_out, filter_feed
+from recipes.models import (Favorite, Ingredient, Recipe, ShoppingCart,
+                            ShoppingListItem, Tag)
+from recipes.signals import relations_changed
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import ReadOnlyModelViewSet
 
+from .cache import versioned_cache
 from .filtersets import IngredientSearchFilter, RecipeSearchFilter
-from .paginator import SixPagination
+from .metrics import query_metrics
+from .paginator import (CursorPaginationMixin, SixCursorPagination,
+                        SixPagination)
 from .permissions import IsAuthorOrReadOnly
-from .serializers import (FavoriteSerializer, IngredientSerializer,
-                          RecipeInListSerializer, RecipeViewSerializer,
-                          RecipeWriteSerializer, ShoppingCartSerializer,
-                          TagSerializer)
+from .relations import (add_relation, add_relations, get_target_id,
+                        relation_error, remove_relation, remove_relations)
+from .serializers import (BULK_ADD, BULK_REMOVE, BULK_REPLACE,
+                          IngredientSerializer, RecipeInListSerializer,
+                          RecipeListBulkSerializer, RecipeViewSerializer,
+                          RecipeWriteSerializer, TagSerializer)
+from .utils.ingredient_index import ingredient_index
+from .utils.shopping_cart import SHOPPING_LIST_FORMATS, render_shopping_list
 
 
+@method_decorator(versioned_cache(Tag), name='list')
+@method_decorator(versioned_cache(Tag), name='retrieve')
 class TagViewSet(ReadOnlyModelViewSet):
     """API тэгов."""
     queryset = Tag.objects.all()
+    query_budget = 2
     pagination_class = None
     serializer_class = TagSerializer
 
 
+@method_decorator(versioned_cache(Ingredient), name='list')
+@method_decorator(versioned_cache(Ingredient), name='retrieve')
 class IngredientViewSet(ReadOnlyModelViewSet):
     """API ингредиентов."""
     queryset = Ingredient.objects.all()
+    query_budget = 2
     serializer_class = IngredientSerializer
     pagination_class = None
     filter_backends = (DjangoFilterBackend,)
     filterset_class = IngredientSearchFilter
 
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get('name')
+        if name:
+            return Response(ingredient_index.search(name))
+        return super().list(request, *args, **kwargs)
 
-class RecipeViewSet(viewsets.ModelViewSet):
+
+class RecipeViewSet(CursorPaginationMixin, viewsets.ModelViewSet):
     """API рецептов"""
-    queryset = Recipe.objects.all().order_by('-id')
+    queryset = Recipe.objects.defer('search_vector').order_by(
+        '-pub_date', '-id'
+    )
     permission_classes = (IsAuthorOrReadOnly,)
     pagination_class = SixPagination
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeSearchFilter
+    query_budget = {
+        'list': 9,
+        'retrieve': 8,
+        'create': 14,
+        'update': 20,
+        'partial_update': 20,
+        'destroy': 20,
+        'shopping_cart': 10,
+        'favorite': 6,
+        'shopping_cart_bulk': 14,
+        'favorite_bulk': 10,
+        'download_shopping_cart': 2,
+        'shopping_list': 2,
+        'feed': 9,
+    }
+    relation_errors = {
+        ShoppingCart: (
+            'Рецепт уже добавлен в список покупок.',
+            'Данного рецепта нет в списке покупок.',
+        ),
+        Favorite: (
+            'Рецепт уже добавлен в избранное.',
+            'Данного рецепта нет в избранном.',
+        ),
+    }
+    bulk_unchanged = {
+        BULK_ADD: 'exists',
+        BULK_REMOVE: 'missing',
+        BULK_REPLACE: 'unchanged',
+    }
 
     def get_serializer_class(self):
-        if self.action in ('list', 'retrieve'):
+        if self.action in ('list', 'retrieve', 'feed'):
             return RecipeViewSerializer
         return RecipeWriteSerializer
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        fan_out(serializer.save(author=self.request.user))
 
-    def add_to_list(self, author, recipe, serializer):
-        serializer = serializer(
-            data={'author': author.id, 'recipe': recipe.id},
-            context={'action': 'add'}
-        )
+    def add_to_list(self, author, pk, model):
+        recipe_id = get_target_id(pk)
+        if add_relation(model, 'author', author.id, 'recipe', recipe_id):
+            recipe = Recipe.objects.only(
+                'id', 'name', 'image', 'cooking_time'
+            ).get(pk=recipe_id)
+            return Response(
+                data=RecipeInListSerializer(recipe).data,
+                status=status.HTTP_201_CREATED,
+            )
+        if not Recipe.objects.filter(pk=recipe_id).exists():
+            raise Http404
+        raise relation_error(self.relation_errors[model][0])
+
+    def remove_from_list(self, author, pk, model):
+        recipe_id = get_target_id(pk)
+        if remove_relation(model, 'author', author.id, 'recipe', recipe_id):
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        if not Recipe.objects.filter(pk=recipe_id).exists():
+            raise Http404
+        raise relation_error(self.relation_errors[model][1])
+
+    def bulk_update_list(self, request, model):
+        """Добавляет, удаляет или заменяет рецепты списка целиком.
+
+        Все изменения идут одним INSERT и/или одним DELETE в одной
+        транзакции; для каждого id возвращается его итог.
+        """
+        serializer = RecipeListBulkSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save(recipe=recipe, author=author)
-        response_serializer = RecipeInListSerializer(recipe)
-        return Response(
-            data=response_serializer.data,
-            status=status.HTTP_201_CREATED,
-        )
+        bulk_action = serializer.validated_data['action']
+        recipe_ids = serializer.validated_data['recipes']
+        author_id = request.user.id
+        with transaction.atomic():
+            found = set(Recipe.objects.filter(
+                pk__in=recipe_ids
+            ).order_by().values_list('id', flat=True))
+            added, removed = self.apply_bulk(
+                model, author_id, bulk_action, found
+            )
+            if added or removed:
+                relations_changed.send(
+                    sender=model, author_id=author_id,
+                    added=added, removed=removed
+                )
+        results = []
+        for recipe_id in recipe_ids:
+            if recipe_id not in found:
+                outcome = 'not_found'
+            elif recipe_id in added:
+                outcome = 'added'
+            elif recipe_id in removed:
+                outcome = 'removed'
+            else:
+                outcome = self.bulk_unchanged[bulk_action]
+            results.append({'id': recipe_id, 'status': outcome})
+        if bulk_action == BULK_REPLACE:
+            results.extend(
+                {'id': recipe_id, 'status': 'removed'}
+                for recipe_id in sorted(removed)
+            )
+        return Response({'results': results})
 
-    def remove_from_list(self, author, recipe, serializer):
-        serializer = serializer(
-            data={'author': author.id, 'recipe': recipe.id},
-            context={'action': 'remove'}
+    def apply_bulk(self, model, author_id, bulk_action, recipe_ids):
+        if bulk_action == BULK_ADD:
+            added = add_relations(
+                model, 'author', author_id, 'recipe', recipe_ids
+            )
+            return added, set()
+        if bulk_action == BULK_REMOVE:
+            removed = remove_relations(
+                model, 'author', author_id, 'recipe', recipe_ids
+            )
+            return set(), removed
+        current = set(model.objects.filter(
+            author_id=author_id
+        ).values_list('recipe_id', flat=True))
+        removed = remove_relations(
+            model, 'author', author_id, 'recipe', current - recipe_ids
         )
-        serializer.is_valid(raise_exception=True)
-        return Response(status=status.HTTP_204_NO_CONTENT)
+        added = add_relations(
+            model, 'author', author_id, 'recipe', recipe_ids - current
+        )
+        return added, removed
+
+    @action(
+        detail=False,
+        methods=['POST'],
+        permission_classes=[IsAuthenticated],
+        url_path='shopping_cart/bulk'
+    )
+    def shopping_cart_bulk(self, request):
+        return self.bulk_update_list(request, ShoppingCart)
+
+    @action(
+        detail=False,
+        methods=['POST'],
+        permission_classes=[IsAuthenticated],
+        url_path='favorite/bulk'
+    )
+    def favorite_bulk(self, request):
+        return self.bulk_update_list(request, Favorite)
 
     @action(
         detail=True,
@@ -77,18 +215,9 @@ class RecipeViewSet(viewsets.ModelViewSet):
         permission_classes=[IsAuthenticated]
     )
     def shopping_cart(self, request, pk):
-        recipe = get_object_or_404(Recipe, id=pk)
         if request.method == 'POST':
-            return self.add_to_list(
-                request.user,
-                recipe,
-                ShoppingCartSerializer
-            )
-        return self.remove_from_list(
-            request.user,
-            recipe,
-            ShoppingCartSerializer
-        )
+            return self.add_to_list(request.user, pk, ShoppingCart)
+        return self.remove_from_list(request.user, pk, ShoppingCart)
 
     @action(
         detail=False,
@@ -99,23 +228,56 @@ class RecipeViewSet(viewsets.ModelViewSet):
         url_path='download_shopping_cart', url_name='txt_shopping_cart',
     )
     def download_shopping_cart(self, request):
-        user = request.user
-        shopping_list = user.shopping_cart.values(
-            'recipe__ingredients__name',
-            'recipe__ingredients__measurement_unit',
-        ).annotate(
-            amount=Sum(
-                'recipe__recipe_ingredient_related__amount',
-                distinct=True
+        file_format = request.query_params.get('file_format', 'txt')
+        if file_format not in SHOPPING_LIST_FORMATS:
+            return Response(
+                {'errors': 'Неподдерживаемый формат файла.'},
+                status=status.HTTP_400_BAD_REQUEST
             )
+        shopping_list = ShoppingListItem.objects.filter(
+            user=request.user
+        ).values_list(
+            'ingredient__name',
+            'ingredient__measurement_unit',
+            'total_amount',
+        ).order_by('ingredient__name', 'ingredient__measurement_unit')
+        content, content_type = render_shopping_list(
+            shopping_list.iterator(), file_format
+        )
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = (
+            f'attachment; filename="shopping_list.{file_format}"'
         )
-        count = 1
-        text = 'Список покупок:\n'
-        for line in shopping_list:
-            name, unit, amount = list(line.values())
-            text += f'{count}. {name} ({unit}) — {amount}\n'
-            count += 1
-        return HttpResponse(text, content_type='text/plain')
+        return response
+
+    @action(
+        detail=False,
+        methods=['GET'],
+        permission_classes=[IsAuthenticated]
+    )
+    def shopping_list(self, request):
+        """Итоговый список покупок для предпросмотра."""
+        return Response(ShoppingListItem.objects.filter(
+            user=request.user
+        ).values(
+            'ingredient_id',
+            name=F('ingredient__name'),
+            measurement_unit=F('ingredient__measurement_unit'),
+            amount=F('total_amount'),
+        ).order_by('name', 'measurement_unit'))
+
+    @action(
+        detail=False,
+        methods=['GET'],
+        permission_classes=[IsAuthenticated],
+        pagination_class=SixCursorPagination
+    )
+    def feed(self, request):
+        """Лента рецептов авторов, на которых подписан пользователь."""
+        queryset = filter_feed(self.get_queryset(), request.user)
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     @action(
         methods=['POST', 'DELETE'],
@@ -123,15 +285,18 @@ class RecipeViewSet(viewsets.ModelViewSet):
         permission_classes=[IsAuthenticated]
     )
     def favorite(self, request, pk):
-        recipe = get_object_or_404(Recipe, id=pk)
         if request.method == 'POST':
-            return self.add_to_list(
-                request.user,
-                recipe,
-                FavoriteSerializer
-            )
-        return self.remove_from_list(
-            request.user,
-            recipe,
-            FavoriteSerializer
-        )
+            return self.add_to_list(request.user, pk, Favorite)
+        return self.remove_from_list(request.user, pk, Favorite)
+
+
+class QueryMetricsView(APIView):
+    """Гистограммы SQL-запросов по маршрутам (только для админов)."""
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response(query_metrics.snapshot())
+
+    def delete(self, request):
+        query_metrics.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -28,6 +28,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'djoser',
@@ -38,6 +39,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.QueryBudgetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -79,6 +81,16 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='foodgram'),
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -108,10 +120,31 @@ AUTH_USER_MODEL = 'users.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ]
 }
 
+# SHARED_TTL действует, только если CACHE_BACKEND общий для воркеров
+# (Memcached, база данных и т. п.); с LocMemCache он не используется.
+TOKEN_AUTH_CACHE = {
+    'LOCAL_SIZE': 1024,
+    'LOCAL_TTL': 30,
+    'SHARED_TTL': 60 * 5,
+}
+
+QUERY_METRICS = {
+    'ENABLED': True,
+    'DEFAULT_BUDGET': None,
+    'STRICT': os.getenv('QUERY_BUDGET_STRICT', default='') == '1',
+    'SERVER_TIMING': True,
+    'SLOWEST': 5,
+}
+
+FEED = {
+    'FANOUT_LIMIT': 1000,
+    'BACKFILL_SIZE': 50,
+}
+
 DJOSER = {
     'LOGIN_FIELD': 'email',
     'HIDE_USERS': False,
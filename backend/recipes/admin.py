@@ -1,6 +1,8 @@
 from django.contrib import admin
 from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
                             ShoppingCart, Tag)
+from recipes.search import update_search_vector
+from recipes.shopping_list import recipe_changed
 
 
 class IngredientInline(admin.TabularInline):
@@ -25,8 +27,14 @@ class RecipeAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
     def favorites(self, obj):
-        favorite = Favorite.objects.filter(recipe=obj)
-        return favorite.count()
+        return obj.favorites_count
+    favorites.admin_order_field = 'favorites_count'
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        update_search_vector([form.instance.pk])
+        if change:
+            recipe_changed(form.instance.pk, None)
 
 
 class RecipeIngredientAdmin(admin.ModelAdmin):
@@ -0,0 +1,53 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from users.models import Follow, User
+
+from .models import Favorite, Recipe, ShoppingCart
+
+RELATION_COUNTERS = {
+    Favorite: ('favorites_count', 'favorites_count'),
+    ShoppingCart: ('in_cart_count', 'shopping_cart_count'),
+}
+
+
+def change_counter(queryset, field, delta):
+    """Атомарно меняет счётчик, не опуская его ниже нуля."""
+    if delta < 0:
+        value = Greatest(F(field) + delta, 0)
+    else:
+        value = F(field) + delta
+    queryset.update(**{field: value})
+
+
+def change_relation_counters(model, author_id, recipe_ids, delta):
+    """Меняет счётчики рецептов на delta, а пользователя — на сумму."""
+    recipe_field, user_field = RELATION_COUNTERS[model]
+    change_counter(
+        Recipe.objects.filter(pk__in=recipe_ids), recipe_field, delta
+    )
+    change_counter(
+        User.objects.filter(pk=author_id), user_field,
+        delta * len(recipe_ids)
+    )
+
+
+def count_subquery(model, field):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')}).order_by().values(
+            field
+        ).annotate(count=Count('pk')).values('count')
+    ), 0)
+
+
+def rebuild_counters():
+    """Пересчитывает все денормализованные счётчики по исходным таблицам."""
+    Recipe.objects.update(
+        favorites_count=count_subquery(Favorite, 'recipe'),
+        in_cart_count=count_subquery(ShoppingCart, 'recipe'),
+    )
+    User.objects.update(
+        recipes_count=count_subquery(Recipe, 'author'),
+        favorites_count=count_subquery(Favorite, 'author'),
+        shopping_cart_count=count_subquery(ShoppingCart, 'author'),
+        followers_count=count_subquery(Follow, 'author'),
+    )
@@ -0,0 +1,117 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from users.models import Follow, User
+
+from .models import FeedItem, Recipe
+
+
+def fan_out(recipe):
+    """Рассылает новый рецепт в ленты подписчиков автора.
+
+    Рецепты авторов, у которых подписчиков больше FANOUT_LIMIT,
+    не рассылаются: лента добирает их при чтении.
+    """
+    followers = Follow.objects.filter(
+        author_id=recipe.author_id,
+        author__followers_count__lte=settings.FEED['FANOUT_LIMIT']
+    ).order_by().values_list('user_id', flat=True)
+    FeedItem.objects.bulk_create(
+        [
+            FeedItem(user_id=user_id, recipe_id=recipe.pk)
+            for user_id in followers
+        ],
+        batch_size=1000,
+        ignore_conflicts=True
+    )
+
+
+def get_latest_recipes(**filters):
+    return Recipe.objects.filter(**filters).order_by(
+        '-pub_date', '-id'
+    ).values_list('id', flat=True)[:settings.FEED['BACKFILL_SIZE']]
+
+
+def add_feed_items(user_ids, recipe_ids):
+    recipe_ids = list(recipe_ids)
+    FeedItem.objects.bulk_create(
+        [
+            FeedItem(user_id=user_id, recipe_id=recipe_id)
+            for user_id in user_ids
+            for recipe_id in recipe_ids
+        ],
+        batch_size=1000,
+        ignore_conflicts=True
+    )
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту нового подписчика последние рецепты автора."""
+    add_feed_items([user_id], get_latest_recipes(
+        author_id=author_id,
+        author__followers_count__lte=settings.FEED['FANOUT_LIMIT']
+    ))
+
+
+def refill_followers(author_id):
+    """Заполняет ленты подписчиков автора, переставшего быть популярным.
+
+    Пока подписчиков больше FANOUT_LIMIT, рецепты автора не
+    рассылаются, а добираются при чтении. Когда после отписки их
+    становится ровно FANOUT_LIMIT, чтение по подписке прекращается,
+    поэтому последние рецепты рассылаются всем оставшимся подписчикам.
+    """
+    if not User.objects.filter(
+        pk=author_id, followers_count=settings.FEED['FANOUT_LIMIT']
+    ).exists():
+        return
+    add_feed_items(
+        Follow.objects.filter(author_id=author_id).order_by().values_list(
+            'user_id', flat=True
+        ),
+        get_latest_recipes(author_id=author_id)
+    )
+
+
+def unfollow(user_id, author_id):
+    FeedItem.objects.filter(
+        user_id=user_id, recipe__author_id=author_id
+    ).delete()
+
+
+def rebuild_feeds():
+    """Заново заполняет ленты всех пользователей.
+
+    Использует followers_count, поэтому счётчики должны быть
+    пересчитаны заранее.
+    """
+    with transaction.atomic():
+        FeedItem.objects.all().delete()
+        authors = User.objects.filter(
+            followers_count__gt=0,
+            followers_count__lte=settings.FEED['FANOUT_LIMIT']
+        ).values_list('id', flat=True)
+        for author_id in authors.iterator():
+            add_feed_items(
+                Follow.objects.filter(author_id=author_id).order_by(
+                ).values_list('user_id', flat=True),
+                get_latest_recipes(author_id=author_id)
+            )
+
+
+def filter_feed(queryset, user):
+    """Оставляет рецепты из ленты пользователя.
+
+    Разосланные рецепты берутся из FeedItem, рецепты популярных
+    авторов — напрямую по подписке (рассылка при чтении).
+    """
+    condition = Q(pk__in=FeedItem.objects.filter(
+        user=user
+    ).values('recipe_id'))
+    popular = list(Follow.objects.filter(
+        user=user,
+        author__followers_count__gt=settings.FEED['FANOUT_LIMIT']
+    ).order_by().values_list('author_id', flat=True))
+    if popular:
+        condition |= Q(author_id__in=popular)
+    return queryset.filter(condition)
@@ -0,0 +1,182 @@
+import json
+import statistics
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from recipes.models import Ingredient, Recipe, Tag
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from users.models import User
+
+from .seed_benchmark import PREFIX
+
+DEFAULT_REPEAT = 20
+DEFAULT_WARMUP = 2
+SEARCH_QUERY = 'мол'
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def get_commit():
+    try:
+        return subprocess.run(
+            ('git', 'rev-parse', '--short', 'HEAD'),
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержку, количество SQL-запросов и память основных '
+        'эндпоинтов API на данных seed_benchmark и пишет результат '
+        'в JSON. Работает на той базе, что указана в настройках '
+        '(SQLite или локальный PostgreSQL).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat', default=DEFAULT_REPEAT, type=int,
+            help='Количество замеров на сценарий.'
+        )
+        parser.add_argument(
+            '--warmup', default=DEFAULT_WARMUP, type=int,
+            help='Количество прогревочных запросов на сценарий.'
+        )
+        parser.add_argument(
+            '--cold',
+            action='store_true',
+            help='Очищать кэш перед каждым запросом.'
+        )
+        parser.add_argument(
+            '--only', nargs='*', default=None,
+            help='Запустить только перечисленные сценарии.'
+        )
+        parser.add_argument(
+            '--output', type=Path, default=None,
+            help='Файл для JSON-результата (по умолчанию stdout).'
+        )
+
+    def get_scenarios(self, user):
+        recipe = Recipe.objects.filter(author=user).only('id').first()
+        author = User.objects.filter(
+            following__user=user
+        ).only('id').first() or user
+        slugs = list(Tag.objects.filter(
+            slug__startswith=PREFIX
+        ).values_list('slug', flat=True)[:2])
+        tags = '&'.join(f'tags={slug}' for slug in slugs)
+        return {
+            'recipes_list': '/api/recipes/',
+            'recipes_list_cursor': '/api/recipes/?pagination=cursor',
+            'recipes_list_limit_30': '/api/recipes/?limit=30',
+            'recipes_retrieve': f'/api/recipes/{recipe.id}/',
+            'recipes_filter_tags': f'/api/recipes/?{tags}',
+            'recipes_filter_author': f'/api/recipes/?author={author.id}',
+            'recipes_filter_favorited': '/api/recipes/?is_favorited=1',
+            'recipes_filter_in_cart': '/api/recipes/?is_in_shopping_cart=1',
+            'download_shopping_cart': (
+                '/api/recipes/download_shopping_cart/'
+            ),
+            'subscriptions': '/api/users/subscriptions/?recipes_limit=3',
+            'feed': '/api/recipes/feed/',
+            'ingredient_search': f'/api/ingredients/?name={SEARCH_QUERY}',
+        }
+
+    def request(self, client, path, cold):
+        if cold:
+            cache.clear()
+        response = client.get(path)
+        content = (
+            b''.join(response.streaming_content) if response.streaming
+            else response.content
+        )
+        if response.status_code != 200:
+            raise CommandError(f'{path}: status {response.status_code}')
+        return len(content)
+
+    def measure(self, client, path, options):
+        for _ in range(options['warmup']):
+            self.request(client, path, options['cold'])
+        latencies, queries = [], []
+        for _ in range(options['repeat']):
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                size = self.request(client, path, options['cold'])
+                latencies.append((time.perf_counter() - start) * 1000)
+            queries.append(len(context))
+        tracemalloc.start()
+        self.request(client, path, options['cold'])
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {
+            'path': path,
+            'latency_ms': {
+                'min': round(min(latencies), 3),
+                'median': round(statistics.median(latencies), 3),
+                'p95': round(percentile(latencies, 0.95), 3),
+                'max': round(max(latencies), 3),
+                'mean': round(statistics.mean(latencies), 3),
+            },
+            'queries': {'min': min(queries), 'max': max(queries)},
+            'peak_memory_kb': round(peak / 1024, 1),
+            'response_bytes': size,
+        }
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1 or options['warmup'] < 0:
+            raise CommandError('Repeat must be positive')
+        user = User.objects.filter(
+            username__startswith=PREFIX
+        ).order_by('id').first()
+        if user is None:
+            raise CommandError('No benchmark data, run seed_benchmark')
+        token, _ = Token.objects.get_or_create(user=user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        scenarios = self.get_scenarios(user)
+        only = options['only']
+        if only:
+            unknown = set(only) - set(scenarios)
+            if unknown:
+                raise CommandError(f'Unknown scenarios: {sorted(unknown)}')
+            scenarios = {name: scenarios[name] for name in only}
+        results = {}
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            for name, path in scenarios.items():
+                self.stderr.write(f'{name} ...')
+                results[name] = self.measure(client, path, options)
+        report = {
+            'meta': {
+                'commit': get_commit(),
+                'database': connection.vendor,
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'repeat': options['repeat'],
+                'warmup': options['warmup'],
+                'cold_cache': options['cold'],
+                'users': User.objects.count(),
+                'recipes': Recipe.objects.count(),
+                'ingredients': Ingredient.objects.count(),
+            },
+            'results': results,
+        }
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output'] is None:
+            self.stdout.write(output)
+        else:
+            options['output'].write_text(output + '\n', encoding='utf-8')
+            self.stdout.write(self.style.SUCCESS(
+                f'Results written to {options["output"]}'
+            ))
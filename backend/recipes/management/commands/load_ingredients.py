@@ -1,28 +1,106 @@
 import csv
+import json
+from itertools import islice
+from pathlib import Path
 
+from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from recipes.models import Ingredient
+from recipes.versions import bump_table_version
+
+DEFAULT_PATH = Path(settings.BASE_DIR, 'recipes', 'data', 'ingredients.csv')
+DEFAULT_BATCH_SIZE = 500
+
+
+def read_csv(file):
+    for row in csv.reader(file):
+        yield row[0], row[1]
+
+
+def read_json(file):
+    for item in json.load(file):
+        yield item['name'], item['measurement_unit']
+
+
+READERS = {
+    '.csv': read_csv,
+    '.json': read_json,
+}
 
 
 class Command(BaseCommand):
-    help = 'Загружает ингредиенты из csv-файла /data/ingredients.csv'
+    help = (
+        'Загружает ингредиенты из csv- или json-файла '
+        '(по умолчанию recipes/data/ingredients.csv). '
+        'Уже существующие ингредиенты пропускаются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=DEFAULT_PATH,
+            type=Path,
+            help='Путь к файлу .csv или .json.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            default=DEFAULT_BATCH_SIZE,
+            type=int,
+            help='Количество ингредиентов в одном INSERT.'
+        )
+        parser.add_argument(
+            '--truncate',
+            action='store_true',
+            help=(
+                'Удалить все ингредиенты перед загрузкой '
+                '(вместе с ингредиентами в рецептах).'
+            )
+        )
 
     def handle(self, *args, **options):
-        print('Uploading ingredients to the database ... ', end='')
+        path = options['path']
+        batch_size = options['batch_size']
+        reader = READERS.get(path.suffix.lower())
+        if reader is None:
+            raise CommandError('Unsupported file format')
+        if batch_size < 1:
+            raise CommandError('Batch size must be positive')
+        self.stdout.write(f'Uploading ingredients from {path} ...')
         try:
-            with open('./recipes/data/ingredients.csv') as csvfile:
-                reader = csv.reader(csvfile)
-                for row in reader:
-                    Ingredient(
-                        name=row[0],
-                        measurement_unit=row[1],
-                    ).save()
-                print('Done')
+            with open(path, encoding='utf-8') as file, transaction.atomic():
+                if options['truncate']:
+                    deleted, _ = Ingredient.objects.all().delete()
+                    self.stdout.write(f'Deleted {deleted} rows')
+                total_before = Ingredient.objects.count()
+                processed = self.load(reader(file), batch_size)
+                created = Ingredient.objects.count() - total_before
         except FileNotFoundError:
             raise CommandError("Can't open file")
-        except (IndexError, AttributeError):
+        except (IndexError, KeyError, TypeError, ValueError):
             raise CommandError('Data entry error')
         except PermissionError:
             raise CommandError('File access error')
         except OSError:
             raise CommandError('File system error')
+        bump_table_version(Ingredient)
+        self.stdout.write(self.style.SUCCESS(
+            f'Done: {processed} processed, {created} created, '
+            f'{processed - created} already existed'
+        ))
+
+    def load(self, rows, batch_size):
+        processed = 0
+        while True:
+            batch = [
+                Ingredient(
+                    name=name.strip(),
+                    measurement_unit=measurement_unit.strip(),
+                )
+                for name, measurement_unit in islice(rows, batch_size)
+            ]
+            if not batch:
+                return processed
+            Ingredient.objects.bulk_create(batch, ignore_conflicts=True)
+            processed += len(batch)
+            self.stdout.write(f'  {processed} processed')
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from recipes.feed import rebuild_feeds
+
+
+class Command(BaseCommand):
+    help = (
+        'Заново заполняет ленты подписок всех пользователей. '
+        'Счётчики подписчиков должны быть актуальны (rebuild_counters).'
+    )
+
+    def handle(self, *args, **options):
+        rebuild_feeds()
+        self.stdout.write(self.style.SUCCESS('Feeds rebuilt'))
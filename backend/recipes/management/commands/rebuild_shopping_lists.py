@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from recipes.shopping_list import rebuild_shopping_lists
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает итоговые списки покупок всех пользователей.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rebuild_shopping_lists()
+        self.stdout.write(self.style.SUCCESS('Shopping lists rebuilt'))
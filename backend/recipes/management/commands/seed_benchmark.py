@@ -0,0 +1,197 @@
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from recipes.counters import rebuild_counters
+from recipes.feed import rebuild_feeds
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            ShoppingCart, Tag)
+from recipes.search import update_search_vector
+from recipes.shopping_list import rebuild_shopping_lists
+from recipes.versions import bump_table_version
+from users.models import Follow, User
+
+PREFIX = 'bench'
+PASSWORD = 'bench-password'
+IMAGE = 'recipes/benchmark.png'
+TAGS_COUNT = 6
+BATCH_SIZE = 1000
+
+OPTIONS = (
+    ('users', 100, 'Количество пользователей.'),
+    ('recipes', 10, 'Рецептов на пользователя.'),
+    ('ingredients', 8, 'Ингредиентов в рецепте.'),
+    ('tags', 2, 'Тегов в рецепте.'),
+    ('follows', 10, 'Подписок на пользователя.'),
+    ('favorites', 20, 'Рецептов в избранном пользователя.'),
+    ('cart', 5, 'Рецептов в списке покупок пользователя.'),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу данными для бенчмарков: пользователи, рецепты, '
+        'подписки, ленты, избранное и списки покупок. Ингредиенты загружаются '
+        'из recipes/data/ingredients.csv, если таблица пуста. '
+        'Пользователи и теги создаются с префиксом bench.'
+    )
+
+    def add_arguments(self, parser):
+        for name, default, help_text in OPTIONS:
+            parser.add_argument(
+                f'--{name}', default=default, type=int, help=help_text
+            )
+        parser.add_argument(
+            '--seed', default=0, type=int,
+            help='Начальное значение генератора случайных чисел.'
+        )
+        parser.add_argument(
+            '--flush',
+            action='store_true',
+            help='Удалить ранее созданные данные бенчмарка.'
+        )
+
+    def handle(self, *args, **options):
+        if any(options[name] < 0 for name, _, _ in OPTIONS):
+            raise CommandError('Scale options must not be negative')
+        self.random = random.Random(options['seed'])
+        if not Ingredient.objects.exists():
+            call_command('load_ingredients', stdout=self.stdout)
+        with transaction.atomic():
+            if options['flush']:
+                self.flush()
+            elif User.objects.filter(username__startswith=PREFIX).exists():
+                raise CommandError(
+                    'Benchmark data already exists, use --flush'
+                )
+            users = self.create_users(options['users'])
+            tags = self.create_tags()
+            recipes = self.create_recipes(users, options['recipes'])
+            self.link_recipes(recipes, tags, options)
+            update_search_vector(Recipe.objects.filter(
+                author__username__startswith=PREFIX
+            ).values('pk'))
+            self.create_relations(users, recipes, options)
+            rebuild_counters()
+            rebuild_shopping_lists()
+            rebuild_feeds()
+        bump_table_version(Tag)
+        self.stdout.write(self.style.SUCCESS(
+            f'Done: {len(users)} users, {len(recipes)} recipes'
+        ))
+
+    def flush(self):
+        deleted, _ = User.objects.filter(
+            username__startswith=PREFIX
+        ).delete()
+        Tag.objects.filter(slug__startswith=PREFIX).delete()
+        self.stdout.write(f'Deleted {deleted} rows')
+
+    def sample(self, population, count):
+        return self.random.sample(population, min(count, len(population)))
+
+    def create_users(self, count):
+        password = make_password(PASSWORD)
+        User.objects.bulk_create(
+            [
+                User(
+                    username=f'{PREFIX}{number}',
+                    email=f'{PREFIX}{number}@example.com',
+                    first_name='Бенчмарк',
+                    last_name=str(number),
+                    password=password,
+                )
+                for number in range(count)
+            ],
+            batch_size=BATCH_SIZE
+        )
+        return list(User.objects.filter(
+            username__startswith=PREFIX
+        ).values_list('id', flat=True))
+
+    def create_tags(self):
+        Tag.objects.bulk_create(
+            [
+                Tag(
+                    name=f'{PREFIX} {number}',
+                    color=f'#{self.random.randrange(0x1000000):06x}',
+                    slug=f'{PREFIX}-{number}',
+                )
+                for number in range(TAGS_COUNT)
+            ],
+            ignore_conflicts=True
+        )
+        return list(Tag.objects.filter(
+            slug__startswith=PREFIX
+        ).values_list('id', flat=True))
+
+    def create_recipes(self, users, per_user):
+        Recipe.objects.bulk_create(
+            [
+                Recipe(
+                    author_id=user_id,
+                    name=f'Рецепт {user_id}-{number}',
+                    image=IMAGE,
+                    text='Смешать все ингредиенты и готовить до готовности.',
+                    cooking_time=self.random.randint(5, 180),
+                )
+                for user_id in users
+                for number in range(per_user)
+            ],
+            batch_size=BATCH_SIZE
+        )
+        return list(Recipe.objects.filter(
+            author_id__in=users
+        ).values_list('id', flat=True))
+
+    def link_recipes(self, recipes, tags, options):
+        ingredients = list(Ingredient.objects.values_list('id', flat=True))
+        RecipeIngredient.objects.bulk_create(
+            [
+                RecipeIngredient(
+                    recipe_id=recipe_id,
+                    ingredient_id=ingredient_id,
+                    amount=self.random.randint(1, 500),
+                )
+                for recipe_id in recipes
+                for ingredient_id in self.sample(
+                    ingredients, options['ingredients']
+                )
+            ],
+            batch_size=BATCH_SIZE
+        )
+        recipe_tag = Recipe.tags.through
+        recipe_tag.objects.bulk_create(
+            [
+                recipe_tag(recipe_id=recipe_id, tag_id=tag_id)
+                for recipe_id in recipes
+                for tag_id in self.sample(tags, options['tags'])
+            ],
+            batch_size=BATCH_SIZE
+        )
+
+    def create_relations(self, users, recipes, options):
+        Follow.objects.bulk_create(
+            [
+                Follow(user_id=user_id, author_id=author_id)
+                for user_id in users
+                for author_id in [
+                    author_id for author_id in self.sample(
+                        users, options['follows'] + 1
+                    )
+                    if author_id != user_id
+                ][:options['follows']]
+            ],
+            batch_size=BATCH_SIZE
+        )
+        for model, name in ((Favorite, 'favorites'), (ShoppingCart, 'cart')):
+            model.objects.bulk_create(
+                [
+                    model(author_id=user_id, recipe_id=recipe_id)
+                    for user_id in users
+                    for recipe_id in self.sample(recipes, options[name])
+                ],
+                batch_size=BATCH_SIZE
+            )
@@ -0,0 +1,39 @@
+# Generated by Django 3.2.8 on 2026-10-18 03:42
+
+import re
+
+import django.core.validators
+import webcolors
+from django.db import migrations, models
+
+
+def colors_to_hex(apps, schema_editor):
+    """Переводит сохранённые имена цветов и короткие коды в #rrggbb."""
+    Tag = apps.get_model('recipes', 'Tag')
+    used = set(Tag.objects.values_list('color', flat=True))
+    for tag in Tag.objects.all():
+        color = tag.color.strip().lower()
+        color = webcolors.CSS3_NAMES_TO_HEX.get(color, color)
+        if re.fullmatch(r'#[0-9a-f]{3}', color):
+            color = '#' + ''.join(digit * 2 for digit in color[1:])
+        if color != tag.color and color not in used:
+            used.discard(tag.color)
+            used.add(color)
+            tag.color = color
+            tag.save(update_fields=['color'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_recipe_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(colors_to_hex, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='tag',
+            name='color',
+            field=models.CharField(max_length=8, unique=True, validators=[django.core.validators.RegexValidator('^#[0-9a-f]{6}$', 'Укажите HEX-код цвета в формате #rrggbb.')], verbose_name='Цветовой HEX-код тега'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+from django.db import migrations
+from django.db.models import Count, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(model, field):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')}).order_by().values(
+            field
+        ).annotate(count=Count('pk')).values('count')
+    ), 0)
+
+
+def delete_duplicates(model, *fields):
+    """Оставляет по одной строке (с наименьшим id) на набор полей."""
+    keep = model.objects.order_by().values(*fields).annotate(
+        keep_id=Min('id')
+    ).values('keep_id')
+    deleted, _ = model.objects.exclude(id__in=keep).delete()
+    return deleted
+
+
+def dedupe_relations(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Favorite = apps.get_model('recipes', 'Favorite')
+    ShoppingCart = apps.get_model('recipes', 'ShoppingCart')
+    User = apps.get_model('users', 'User')
+    deleted = (
+        delete_duplicates(Favorite, 'author', 'recipe')
+        + delete_duplicates(ShoppingCart, 'author', 'recipe')
+    )
+    if deleted:
+        Recipe.objects.update(
+            favorites_count=count_subquery(Favorite, 'recipe'),
+            in_cart_count=count_subquery(ShoppingCart, 'recipe'),
+        )
+        User.objects.update(
+            favorites_count=count_subquery(Favorite, 'author'),
+            shopping_cart_count=count_subquery(ShoppingCart, 'author'),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_ingredient_name_trigram_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_relations, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,7 @@
-from django.core.validators import MinValueValidator
+from django.contrib.postgres.search import SearchVectorField
+from django.core.validators import MinValueValidator, RegexValidator
 from django.db import models
-from users.models import User
+from users.models import DenormalizedFieldsMixin, User
 
 
 class Tag(models.Model):
@@ -14,7 +15,11 @@ class Tag(models.Model):
     color = models.CharField(
         verbose_name='Цветовой HEX-код тега',
         max_length=8,
-        unique=True
+        unique=True,
+        validators=[RegexValidator(
+            r'^#[0-9a-f]{6}$',
+            'Укажите HEX-код цвета в формате #rrggbb.'
+        )]
     )
     slug = models.SlugField(
         unique=True,
@@ -55,7 +60,7 @@ class Ingredient(models.Model):
         return self.name
 
 
-class Recipe(models.Model):
+class Recipe(DenormalizedFieldsMixin, models.Model):
     """Модель рецептов."""
 
     author = models.ForeignKey(
@@ -90,6 +95,23 @@ class Recipe(models.Model):
             MinValueValidator(1)]
     )
     pub_date = models.DateTimeField(auto_now_add=True)
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='Добавлений в избранное',
+        default=0,
+        editable=False
+    )
+    in_cart_count = models.PositiveIntegerField(
+        verbose_name='Добавлений в список покупок',
+        default=0,
+        editable=False
+    )
+    search_vector = SearchVectorField(
+        verbose_name='Поисковый вектор',
+        null=True,
+        editable=False
+    )
+
+    denormalized_fields = ('favorites_count', 'in_cart_count', 'search_vector')
 
     def __str__(self):
         return self.name
@@ -98,6 +120,12 @@ class Recipe(models.Model):
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='recipe_pub_date_id_idx'
+            ),
+        ]
 
 
 class RecipeIngredient(models.Model):
@@ -150,6 +178,12 @@ class ShoppingCart(models.Model):
     class Meta:
         verbose_name = 'Список покупок'
         ordering = ['author']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['author', 'recipe'],
+                name='unique_shopping_cart'
+            )
+        ]
 
 
 class Favorite(models.Model):
@@ -172,3 +206,70 @@ class Favorite(models.Model):
         verbose_name = 'Избранный рецепт'
         verbose_name_plural = 'Избранные рецепты'
         ordering = ['author']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['author', 'recipe'],
+                name='unique_favorite'
+            )
+        ]
+
+
+class ShoppingListItem(models.Model):
+    """Модель итогового списка покупок пользователя.
+
+    Суммы ингредиентов по рецептам из списка покупок, которые
+    пересчитываются при изменении списка и состава рецептов.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_list_items',
+        verbose_name='Покупатель'
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='shopping_list_items',
+        verbose_name='Ингредиент'
+    )
+    total_amount = models.PositiveIntegerField(
+        verbose_name='Общее количество'
+    )
+
+    class Meta:
+        verbose_name = 'Позиция списка покупок'
+        verbose_name_plural = 'Позиции списка покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique_shopping_list_item'
+            )
+        ]
+
+
+class FeedItem(models.Model):
+    """Модель ленты подписок: рецепт, разосланный подписчику автора."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_items',
+        verbose_name='Подписчик'
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_items',
+        verbose_name='Рецепт'
+    )
+
+    class Meta:
+        verbose_name = 'Рецепт в ленте'
+        verbose_name_plural = 'Ленты подписок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_feed_item'
+            )
+        ]
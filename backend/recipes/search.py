@@ -0,0 +1,55 @@
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connection
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Recipe, RecipeIngredient
+from .versions import bump_table_version
+
+SEARCH_CONFIG = 'russian'
+
+
+def uses_search_vector():
+    return connection.vendor == 'postgresql'
+
+
+def ingredient_names():
+    return Coalesce(Subquery(
+        RecipeIngredient.objects.filter(
+            recipe_id=OuterRef('pk')
+        ).order_by().values('recipe_id').annotate(
+            names=StringAgg('ingredient__name', ' ')
+        ).values('names')
+    ), Value(''))
+
+
+def recipe_search_vector():
+    """Название весит больше ингредиентов, ингредиенты — больше текста."""
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector(ingredient_names(), weight='B', config=SEARCH_CONFIG)
+        + SearchVector('text', weight='C', config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vector(recipes):
+    """Пересчитывает поисковый вектор рецептов после изменения.
+
+    Вектор хранится только в PostgreSQL; на других базах сбрасывается
+    версия таблицы рецептов, по которой перестраивается индекс в памяти.
+    """
+    if uses_search_vector():
+        Recipe.objects.filter(pk__in=recipes).update(
+            search_vector=recipe_search_vector()
+        )
+    bump_table_version(Recipe)
+
+
+def search_recipes(queryset, text):
+    """Фильтрует рецепты по запросу и сортирует по релевантности."""
+    query = SearchQuery(text, config=SEARCH_CONFIG)
+    return queryset.filter(search_vector=query).annotate(
+        search_rank=SearchRank(F('search_vector'), query)
+    ).order_by('-search_rank', '-pub_date', '-id')
@@ -0,0 +1,70 @@
+from django.db import transaction
+from django.db.models import Sum
+from users.models import User
+
+from .models import RecipeIngredient, ShoppingCart, ShoppingListItem
+
+
+def refresh_shopping_lists(user_ids, ingredient_ids=None):
+    """Пересчитывает строки списков покупок пользователей.
+
+    user_ids и ingredient_ids могут быть списками или подзапросами.
+    Если ingredient_ids не задан, список пересчитывается целиком.
+    Строки пользователей блокируются до конца транзакции, поэтому
+    параллельные изменения одного списка пересчитываются по очереди
+    и каждый следующий пересчёт видит результат предыдущего.
+    """
+    with transaction.atomic(savepoint=False):
+        user_ids = list(User.objects.select_for_update().filter(
+            pk__in=user_ids
+        ).order_by('pk').values_list('pk', flat=True))
+        if not user_ids:
+            return
+        items = ShoppingListItem.objects.filter(user_id__in=user_ids)
+        amounts = RecipeIngredient.objects.filter(
+            recipe__shopping_cart__author_id__in=user_ids
+        )
+        if ingredient_ids is not None:
+            items = items.filter(ingredient_id__in=ingredient_ids)
+            amounts = amounts.filter(ingredient_id__in=ingredient_ids)
+        items.delete()
+        ShoppingListItem.objects.bulk_create(
+            ShoppingListItem(
+                user_id=row['recipe__shopping_cart__author_id'],
+                ingredient_id=row['ingredient_id'],
+                total_amount=row['total_amount'],
+            )
+            for row in amounts.order_by().values(
+                'recipe__shopping_cart__author_id', 'ingredient_id'
+            ).annotate(total_amount=Sum('amount'))
+        )
+
+
+def cart_recipes_changed(user_id, recipe_ids):
+    """Пересчитывает ингредиенты рецептов, добавленных или убранных.
+
+    При удалении рецепта каскадом его ингредиенты могут быть удалены
+    раньше строк списка покупок; тогда пересчёт делают сигналы
+    RecipeIngredient, пока строки списка ещё на месте.
+    """
+    refresh_shopping_lists([user_id], RecipeIngredient.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values('ingredient_id'))
+
+
+def recipe_changed(recipe_id, ingredient_ids):
+    """Пересчитывает списки всех, у кого рецепт в списке покупок."""
+    refresh_shopping_lists(
+        ShoppingCart.objects.filter(
+            recipe_id=recipe_id
+        ).order_by().values('author_id'),
+        ingredient_ids
+    )
+
+
+def rebuild_shopping_lists():
+    with transaction.atomic():
+        ShoppingListItem.objects.all().delete()
+        refresh_shopping_lists(
+            ShoppingCart.objects.order_by().values('author_id').distinct()
+        )
@@ -0,0 +1,137 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import Signal, receiver
+from users.models import Follow, User
+
+from .counters import change_counter, change_relation_counters
+from .feed import backfill, refill_followers, unfollow
+from .models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                     ShoppingCart, Tag)
+from .search import update_search_vector
+from .shopping_list import cart_recipes_changed, recipe_changed
+from .versions import bump_table_version
+
+# Массовое изменение избранного или списка покупок одного пользователя.
+# Аргументы: author_id, added и removed — множества id рецептов.
+relations_changed = Signal()
+
+
+@receiver([post_save, post_delete], sender=Tag)
+@receiver([post_save, post_delete], sender=Ingredient)
+def bump_reference_version(sender, **kwargs):
+    bump_table_version(sender)
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_renamed(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        update_search_vector(
+            instance.recipes.values('recipe_id')
+        )
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+def relation_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        change_relation_counters(
+            sender, instance.author_id, [instance.recipe_id], 1
+        )
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+def relation_deleted(sender, instance, **kwargs):
+    change_relation_counters(
+        sender, instance.author_id, [instance.recipe_id], -1
+    )
+
+
+@receiver(post_save, sender=ShoppingCart)
+def cart_recipe_added(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        cart_recipes_changed(instance.author_id, [instance.recipe_id])
+
+
+@receiver(post_delete, sender=ShoppingCart)
+def cart_recipe_removed(sender, instance, **kwargs):
+    cart_recipes_changed(instance.author_id, [instance.recipe_id])
+
+
+@receiver(relations_changed, sender=ShoppingCart)
+def cart_changed(sender, author_id, added, removed, **kwargs):
+    cart_recipes_changed(author_id, added | removed)
+
+
+@receiver(post_init, sender=RecipeIngredient)
+def remember_ingredient(sender, instance, **kwargs):
+    instance._saved_ingredient_id = instance.ingredient_id
+
+
+@receiver(post_save, sender=RecipeIngredient)
+def recipe_ingredient_saved(sender, instance, created, raw=False, **kwargs):
+    # Изменения в обход сериализатора: админка, shell, каскады.
+    if raw:
+        return
+    ingredient_ids = {instance.ingredient_id}
+    if not created and instance._saved_ingredient_id is not None:
+        ingredient_ids.add(instance._saved_ingredient_id)
+    instance._saved_ingredient_id = instance.ingredient_id
+    recipe_changed(instance.recipe_id, ingredient_ids)
+
+
+@receiver(post_delete, sender=RecipeIngredient)
+def recipe_ingredient_deleted(sender, instance, **kwargs):
+    recipe_changed(instance.recipe_id, [instance.ingredient_id])
+
+
+@receiver(relations_changed, sender=Favorite)
+@receiver(relations_changed, sender=ShoppingCart)
+def relations_changed_counters(sender, author_id, added, removed, **kwargs):
+    if added:
+        change_relation_counters(sender, author_id, added, 1)
+    if removed:
+        change_relation_counters(sender, author_id, removed, -1)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        change_counter(
+            User.objects.filter(pk=instance.author_id), 'followers_count', 1
+        )
+        backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    change_counter(
+        User.objects.filter(pk=instance.author_id), 'followers_count', -1
+    )
+    unfollow(instance.user_id, instance.author_id)
+    refill_followers(instance.author_id)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        change_counter(
+            User.objects.filter(pk=instance.author_id), 'recipes_count', 1
+        )
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender, instance, raw=False, **kwargs):
+    # После коммита: ингредиенты сохраняются уже после самого рецепта.
+    if not raw:
+        transaction.on_commit(partial(update_search_vector, [instance.pk]))
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    change_counter(
+        User.objects.filter(pk=instance.author_id), 'recipes_count', -1
+    )
+    bump_table_version(Recipe)
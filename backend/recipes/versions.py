@@ -0,0 +1,27 @@
+import time
+
+from django.core.cache import cache
+
+VERSION_KEY = 'table-version:{}'
+
+
+def get_table_version(model):
+    """Текущая версия таблицы модели.
+
+    Начальное значение берётся от времени, чтобы после вытеснения
+    ключа из кэша версия не повторила уже выданную.
+    """
+    key = VERSION_KEY.format(model._meta.label_lower)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_table_version(model):
+    key = VERSION_KEY.format(model._meta.label_lower)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
@@ -0,0 +1,137 @@
+import base64
+
+import pytest
+from api.authentication import token_cache
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from users.models import User
+
+PNG = base64.b64decode(
+    'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABAgMAAABieywaAAAACVBMVEUAAAD///9fX1/S0e'
+    'cCAAAACXBIWXMAAA7EAAAOxAGVKw4bAAAACklEQVQI12NgAAAAAgAB4iG8MwAAAABJRU5E'
+    'rkJggg=='
+)
+PNG_DATA_URL = 'data:image/png;base64,' + base64.b64encode(PNG).decode()
+
+
+def clear_caches():
+    cache.clear()
+    token_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    clear_caches()
+    yield
+    clear_caches()
+
+
+@pytest.fixture
+def strict_budgets(settings):
+    """Превышение query_budget роняет запрос.
+
+    Только для тестов без внешней транзакции: внутри неё atomic()
+    добавляет SAVEPOINT, которых нет в рабочем режиме.
+    """
+    settings.QUERY_METRICS = {**settings.QUERY_METRICS, 'STRICT': True}
+
+
+@pytest.fixture
+def make_user(db):
+    def make(username):
+        return User.objects.create_user(
+            username=username,
+            email=f'{username}@example.com',
+            password='password',
+            first_name=username,
+            last_name=username,
+        )
+    return make
+
+
+@pytest.fixture
+def user(make_user):
+    return make_user('user')
+
+
+@pytest.fixture
+def author(make_user):
+    return make_user('author')
+
+
+@pytest.fixture
+def tags(db):
+    return [
+        Tag.objects.create(name=f'Тэг {index}', color=f'#00000{index}',
+                           slug=f'tag{index}')
+        for index in range(3)
+    ]
+
+
+@pytest.fixture
+def ingredients(db):
+    return [
+        Ingredient.objects.create(name=name, measurement_unit='г')
+        for name in ('молоко', 'мука', 'сахар', 'соль', 'масло')
+    ]
+
+
+@pytest.fixture
+def make_recipe(tags, ingredients):
+    def make(author, name='Рецепт', amounts=None):
+        recipe = Recipe.objects.create(
+            author=author,
+            name=name,
+            text='Описание',
+            cooking_time=10,
+            image=SimpleUploadedFile('recipe.png', PNG, 'image/png'),
+        )
+        recipe.tags.set(tags[:2])
+        amounts = amounts or {ingredients[0]: 100, ingredients[1]: 200}
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, ingredient=ingredient,
+                             amount=amount)
+            for ingredient, amount in amounts.items()
+        )
+        return recipe
+    return make
+
+
+@pytest.fixture
+def client():
+    return APIClient()
+
+
+def token_client(user):
+    client = APIClient()
+    token, _ = Token.objects.get_or_create(user=user)
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    return client
+
+
+@pytest.fixture
+def user_client(user):
+    return token_client(user)
+
+
+@pytest.fixture
+def author_client(author):
+    return token_client(author)
+
+
+@pytest.fixture
+def recipe_payload(tags, ingredients):
+    return {
+        'name': 'Новый рецепт',
+        'text': 'Описание',
+        'cooking_time': 5,
+        'image': PNG_DATA_URL,
+        'tags': [tags[0].id],
+        'ingredients': [
+            {'id': ingredients[0].id, 'amount': 10},
+            {'id': ingredients[2].id, 'amount': 20},
+        ],
+    }
@@ -0,0 +1,44 @@
+from api.authentication import TOKEN_KEY, get_shared_ttl, token_cache
+from django.core.cache import cache
+from rest_framework.authtoken.models import Token
+
+SHARED_BACKEND = 'django.core.cache.backends.filebased.FileBasedCache'
+
+
+def token_key(user):
+    return Token.objects.get(user=user).key
+
+
+def test_local_memory_cache_is_not_shared(user_client, user):
+    assert get_shared_ttl() == 0
+    assert user_client.get('/api/users/me/').status_code == 200
+    assert cache.get(TOKEN_KEY.format(token_key(user))) is None
+
+
+def test_shared_backend_stores_tokens(settings, tmp_path, user_client,
+                                      user):
+    settings.CACHES = {
+        'default': {'BACKEND': SHARED_BACKEND, 'LOCATION': str(tmp_path)}
+    }
+    assert get_shared_ttl() == settings.TOKEN_AUTH_CACHE['SHARED_TTL']
+    assert user_client.get('/api/users/me/').status_code == 200
+    assert cache.get(TOKEN_KEY.format(token_key(user))).id == user.id
+
+
+def test_logout_revokes_cached_token(user_client, user):
+    assert user_client.get('/api/users/me/').status_code == 200
+    key = token_key(user)
+    assert token_cache.get(key) is not None
+    assert user_client.post('/api/auth/token/logout/').status_code == 204
+    assert token_cache.get(key) is None
+    assert user_client.get('/api/users/me/').status_code == 401
+
+
+def test_password_change_revokes_cached_user(user_client, user):
+    assert user_client.get('/api/users/me/').status_code == 200
+    response = user_client.post('/api/users/set_password/', {
+        'current_password': 'password',
+        'new_password': 'new-password-123',
+    }, format='json')
+    assert response.status_code == 204
+    assert token_cache.get(token_key(user)) is None
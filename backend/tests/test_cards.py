@@ -0,0 +1,71 @@
+import pytest
+from recipes.models import RecipeIngredient
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+def get_recipe(client, recipe):
+    response = client.get(f'/api/recipes/{recipe.id}/')
+    assert response.status_code == 200
+    return response.json()
+
+
+def get_amounts(data):
+    return {item['name']: item['amount'] for item in data['ingredients']}
+
+
+def test_recipe_update_refreshes_card(client, author_client, author,
+                                      make_recipe):
+    recipe = make_recipe(author)
+    assert get_recipe(client, recipe)['name'] == 'Рецепт'
+    author_client.patch(
+        f'/api/recipes/{recipe.id}/', {'name': 'Новый'}, format='json'
+    )
+    assert get_recipe(client, recipe)['name'] == 'Новый'
+
+
+def test_ingredient_edits_refresh_card(client, author, make_recipe,
+                                       ingredients):
+    recipe = make_recipe(author)
+    assert get_amounts(get_recipe(client, recipe))['молоко'] == 100
+    item = RecipeIngredient.objects.get(
+        recipe=recipe, ingredient=ingredients[0]
+    )
+    item.amount = 999
+    item.save()
+    assert get_amounts(get_recipe(client, recipe))['молоко'] == 999
+    item.delete()
+    assert 'молоко' not in get_amounts(get_recipe(client, recipe))
+    RecipeIngredient.objects.create(
+        recipe=recipe, ingredient=ingredients[3], amount=5
+    )
+    assert get_amounts(get_recipe(client, recipe))['соль'] == 5
+
+
+def test_tag_and_author_changes_refresh_card(client, author, make_recipe,
+                                             tags):
+    recipe = make_recipe(author)
+    get_recipe(client, recipe)
+    tags[0].name = 'Переименован'
+    tags[0].save()
+    data = get_recipe(client, recipe)
+    assert 'Переименован' in [tag['name'] for tag in data['tags']]
+    author.first_name = 'Иван'
+    author.save()
+    assert get_recipe(client, recipe)['author']['first_name'] == 'Иван'
+
+
+def test_deleted_recipe_is_not_served(client, author, make_recipe):
+    recipe = make_recipe(author)
+    get_recipe(client, recipe)
+    recipe.delete()
+    assert client.get(f'/api/recipes/{recipe.id}/').status_code == 404
+
+
+def test_cached_card_keeps_viewer_flags(client, user_client, author,
+                                        make_recipe):
+    recipe = make_recipe(author)
+    get_recipe(client, recipe)
+    user_client.post(f'/api/recipes/{recipe.id}/favorite/')
+    assert get_recipe(user_client, recipe)['is_favorited']
+    assert not get_recipe(client, recipe)['is_favorited']
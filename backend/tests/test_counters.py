@@ -0,0 +1,85 @@
+import pytest
+from recipes.counters import change_counter, rebuild_counters
+from recipes.models import Favorite, Recipe
+from users.models import User
+
+
+def counters(instance, *fields):
+    instance.refresh_from_db(fields=fields)
+    return tuple(getattr(instance, field) for field in fields)
+
+
+def test_relations_update_counters(user_client, user, author, make_recipe):
+    recipe = make_recipe(author)
+    user_client.post(f'/api/recipes/{recipe.id}/favorite/')
+    user_client.post(f'/api/recipes/{recipe.id}/shopping_cart/')
+    user_client.post(f'/api/users/{author.id}/subscribe/')
+    assert counters(recipe, 'favorites_count', 'in_cart_count') == (1, 1)
+    assert counters(
+        user, 'favorites_count', 'shopping_cart_count'
+    ) == (1, 1)
+    assert counters(author, 'recipes_count', 'followers_count') == (1, 1)
+    user_client.delete(f'/api/recipes/{recipe.id}/favorite/')
+    user_client.delete(f'/api/users/{author.id}/subscribe/')
+    assert counters(recipe, 'favorites_count') == (0,)
+    assert counters(user, 'favorites_count') == (0,)
+    assert counters(author, 'followers_count') == (0,)
+
+
+def test_stale_recipe_save_keeps_counters(user_client, author, make_recipe):
+    recipe = make_recipe(author)
+    stale = Recipe.objects.get(pk=recipe.pk)
+    user_client.post(f'/api/recipes/{recipe.id}/favorite/')
+    stale.name = 'Новое название'
+    stale.save()
+    assert counters(recipe, 'name', 'favorites_count') == (
+        'Новое название', 1
+    )
+
+
+def test_stale_user_save_keeps_counters(user_client, user, author,
+                                        make_recipe):
+    stale = User.objects.get(pk=user.pk)
+    user_client.post(f'/api/recipes/{make_recipe(author).id}/favorite/')
+    stale.first_name = 'Имя'
+    stale.save()
+    assert counters(user, 'first_name', 'favorites_count') == ('Имя', 1)
+
+
+def test_recipe_update_keeps_counters(user_client, author_client, author,
+                                      make_recipe):
+    recipe = make_recipe(author)
+    user_client.post(f'/api/recipes/{recipe.id}/shopping_cart/')
+    response = author_client.patch(
+        f'/api/recipes/{recipe.id}/', {'name': 'Другое'}, format='json'
+    )
+    assert response.status_code == 200
+    assert counters(recipe, 'in_cart_count') == (1,)
+
+
+def test_change_counter_clamps_at_zero(user, author, make_recipe):
+    recipes = [make_recipe(author) for _ in range(2)]
+    Favorite.objects.bulk_create(
+        Favorite(author=user, recipe=recipe) for recipe in recipes
+    )
+    rebuild_counters()
+    User.objects.filter(pk=user.pk).update(favorites_count=1)
+    change_counter(User.objects.filter(pk=user.pk), 'favorites_count', -2)
+    assert counters(user, 'favorites_count') == (0,)
+
+
+@pytest.mark.parametrize('action', ('remove', 'replace'))
+def test_bulk_remove_with_drifted_counter(user_client, user, author,
+                                          make_recipe, action):
+    recipes = [make_recipe(author) for _ in range(3)]
+    user_client.post('/api/recipes/favorite/bulk/', {
+        'action': 'add', 'recipes': [recipe.id for recipe in recipes],
+    }, format='json')
+    User.objects.filter(pk=user.pk).update(favorites_count=1)
+    user_client.post('/api/recipes/favorite/bulk/', {
+        'action': action, 'recipes': [recipes[0].id],
+    }, format='json')
+    assert counters(user, 'favorites_count') == (0,)
+    assert counters(recipes[1], 'favorites_count') == (
+        0 if action == 'replace' else 1,
+    )
@@ -0,0 +1,96 @@
+import pytest
+from django.core.management import call_command
+from recipes.feed import fan_out
+from recipes.models import FeedItem, Recipe
+from users.models import Follow
+
+
+def get_feed(client, **params):
+    response = client.get('/api/recipes/feed/', params)
+    assert response.status_code == 200
+    return response.json()
+
+
+def get_feed_ids(client):
+    return [recipe['id'] for recipe in get_feed(client, limit=100)['results']]
+
+
+@pytest.fixture
+def publish(author, make_recipe):
+    def publish(name='Рецепт', author=author):
+        recipe = make_recipe(author, name)
+        fan_out(recipe)
+        return recipe
+    return publish
+
+
+def test_new_recipe_is_fanned_out(user_client, author_client, author,
+                                  recipe_payload):
+    user_client.post(f'/api/users/{author.id}/subscribe/')
+    response = author_client.post(
+        '/api/recipes/', recipe_payload, format='json'
+    )
+    assert response.status_code == 201
+    recipe = Recipe.objects.get(author=author)
+    assert get_feed_ids(user_client) == [recipe.id]
+
+
+def test_follow_backfills_and_unfollow_clears(user_client, user, author,
+                                              publish, settings):
+    settings.FEED = {**settings.FEED, 'BACKFILL_SIZE': 2}
+    recipes = [publish(f'Рецепт {number}') for number in range(3)]
+    assert get_feed_ids(user_client) == []
+    user_client.post(f'/api/users/{author.id}/subscribe/')
+    assert get_feed_ids(user_client) == [recipes[2].id, recipes[1].id]
+    user_client.delete(f'/api/users/{author.id}/subscribe/')
+    assert get_feed_ids(user_client) == []
+    assert not FeedItem.objects.filter(user=user).exists()
+
+
+def test_popular_author_is_read_through(user_client, user, author,
+                                        make_user, publish, settings):
+    settings.FEED = {**settings.FEED, 'FANOUT_LIMIT': 1}
+    Follow.objects.create(user=make_user('fan'), author=author)
+    Follow.objects.create(user=user, author=author)
+    recipe = publish()
+    assert not FeedItem.objects.filter(recipe=recipe).exists()
+    assert get_feed_ids(user_client) == [recipe.id]
+
+
+def test_recipes_stay_after_author_stops_being_popular(user_client, user,
+                                                       author, make_user,
+                                                       publish, settings):
+    settings.FEED = {**settings.FEED, 'FANOUT_LIMIT': 1}
+    fan = Follow.objects.create(user=make_user('fan'), author=author)
+    Follow.objects.create(user=user, author=author)
+    recipe = publish()
+    fan.delete()
+    assert get_feed_ids(user_client) == [recipe.id]
+    assert FeedItem.objects.filter(user=user, recipe=recipe).exists()
+
+
+def test_cursor_pagination(user_client, author, publish):
+    user_client.post(f'/api/users/{author.id}/subscribe/')
+    recipes = [publish(f'Рецепт {number}') for number in range(5)]
+    page = get_feed(user_client, limit=2)
+    ids = [recipe['id'] for recipe in page['results']]
+    while page['next']:
+        page = user_client.get(page['next']).json()
+        ids += [recipe['id'] for recipe in page['results']]
+    assert ids == [recipe.id for recipe in reversed(recipes)]
+
+
+def test_rebuild_restores_feeds(user_client, author, publish):
+    user_client.post(f'/api/users/{author.id}/subscribe/')
+    recipe = publish()
+    FeedItem.objects.all().delete()
+    call_command('rebuild_feeds', stdout=open('/dev/null', 'w'))
+    assert get_feed_ids(user_client) == [recipe.id]
+
+
+def test_seed_fills_feeds(ingredients):
+    call_command(
+        'seed_benchmark', users=4, recipes=2, ingredients=2, tags=1,
+        follows=2, favorites=1, cart=1, stdout=open('/dev/null', 'w')
+    )
+    assert FeedItem.objects.count() == 4 * 2 * 2
@@ -0,0 +1,74 @@
+import pytest
+from api import signals
+from api.utils import images
+from django.core.files.storage import default_storage
+from recipes.models import Recipe
+
+
+@pytest.fixture
+def scheduled(monkeypatch):
+    names = []
+    monkeypatch.setattr(
+        signals, 'schedule_variants',
+        lambda name, callback=None: names.append(name)
+    )
+    return names
+
+
+def test_variants_scheduled_only_when_image_changes(scheduled, author,
+                                                    make_recipe):
+    recipe = make_recipe(author)
+    original = recipe.image.name
+    assert scheduled == [original]
+    recipe.name = 'Новое название'
+    recipe.save()
+    Recipe.objects.get(pk=recipe.pk).save()
+    Recipe.objects.defer('image').get(pk=recipe.pk).save()
+    assert scheduled == [original]
+    recipe.image = 'other.png'
+    recipe.save()
+    assert scheduled == [original, 'other.png']
+
+
+def test_pending_jobs_are_deduplicated(monkeypatch):
+    submitted = []
+    monkeypatch.setattr(
+        images.executor, 'submit',
+        lambda function, name: submitted.append(name)
+    )
+    calls = []
+    images.submit_variants('same.png', lambda: calls.append(1))
+    images.submit_variants('same.png', lambda: calls.append(2))
+    assert submitted == ['same.png']
+    monkeypatch.setattr(images, 'generate_variants', lambda name: True)
+    images.run_variants('same.png')
+    assert calls == [1, 2]
+    assert 'same.png' not in images.pending_jobs
+
+
+def test_renamed_copy_is_removed(monkeypatch, author, make_recipe):
+    name = make_recipe(author).image.name
+    save = default_storage.save
+
+    def save_renamed(target, content):
+        # Так хранилище ведёт себя, если файл уже сохранил другой воркер.
+        return save(target.replace('.webp', '_race.webp'), content)
+
+    monkeypatch.setattr(default_storage, 'save', save_renamed)
+    assert images.generate_variants(name)
+    _, files = default_storage.listdir(images.VARIANTS_DIR)
+    assert not [file for file in files if '_race' in file]
+
+
+def test_generation_skips_existing_copies(author, make_recipe):
+    name = make_recipe(author).image.name
+    assert images.generate_variants(name)
+    assert not images.generate_variants(name)
+    _, files = default_storage.listdir(images.VARIANTS_DIR)
+    stem = name.rsplit('.', 1)[0]
+    assert sorted(
+        file for file in files if file.startswith(stem)
+    ) == sorted(
+        images.variant_name(name, variant).split('/')[1]
+        for variant in images.VARIANTS
+    )
@@ -0,0 +1,55 @@
+import pytest
+from api.utils.ingredient_index import edit_distance
+from recipes.models import Ingredient
+
+
+@pytest.fixture
+def catalogue(db):
+    Ingredient.objects.bulk_create(
+        Ingredient(name=name, measurement_unit='г') for name in (
+            'молоко', 'молоко сгущённое', 'кокосовое молоко', 'мука',
+            'мускатный орех', 'сахар', 'сахарная пудра', 'соль', 'масло',
+        )
+    )
+
+
+def search(client, name):
+    response = client.get('/api/ingredients/', {'name': name})
+    assert response.status_code == 200
+    return [ingredient['name'] for ingredient in response.json()]
+
+
+def test_prefix_matches_come_first(client, catalogue):
+    assert search(client, 'мол') == [
+        'молоко', 'молоко сгущённое', 'кокосовое молоко'
+    ]
+
+
+def test_substring_matches_follow_prefix(client, catalogue):
+    assert search(client, 'сахар')[:2] == ['сахар', 'сахарная пудра']
+    assert search(client, 'пудра') == ['сахарная пудра']
+
+
+@pytest.mark.parametrize('query, expected', (
+    ('малако', 'молоко'),
+    ('сохар', 'сахар'),
+    ('мускотный', 'мускатный орех'),
+))
+def test_typos_find_ingredient(client, catalogue, query, expected):
+    assert search(client, query)[0] == expected
+
+
+def test_unrelated_query_finds_nothing(client, catalogue):
+    assert search(client, 'шоколад') == []
+
+
+def test_new_ingredient_is_found(client, catalogue):
+    assert search(client, 'малина') == []
+    Ingredient.objects.create(name='малина', measurement_unit='г')
+    assert search(client, 'малина') == ['малина']
+
+
+def test_edit_distance_stops_at_limit():
+    assert edit_distance('малако', 'молоко', 2) == 2
+    assert edit_distance('малако', 'масло', 1) == 2
+    assert edit_distance('соль', 'сахар', 2) == 3
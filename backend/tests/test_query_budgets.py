@@ -0,0 +1,98 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True),
+    pytest.mark.usefixtures('strict_budgets'),
+]
+
+# Запросы к базе при холодном кэше, включая проверку токена.
+# query_budget проверяется в строгом режиме, поэтому запрос
+# сверх бюджета падает раньше, чем сработает сравнение.
+EXPECTED_QUERIES = {
+    'recipes_list': 9,
+    'recipes_retrieve': 8,
+    'recipes_feed': 9,
+    'recipes_create': 14,
+    'recipes_update': 18,
+    'recipes_destroy': 14,
+    'favorite_add': 6,
+    'favorite_remove': 5,
+    'shopping_cart_add': 10,
+    'shopping_cart_remove': 8,
+    'shopping_cart_bulk': 14,
+    'favorite_bulk': 6,
+    'download_shopping_cart': 2,
+    'shopping_list': 2,
+    'subscribe': 10,
+    'subscribe_delete': 6,
+    'subscriptions': 5,
+}
+
+
+@pytest.fixture
+def requests(author, user, make_user, make_recipe, recipe_payload):
+    recipes = [make_recipe(author, f'Рецепт {index}') for index in range(8)]
+    own = make_recipe(user, 'Свой рецепт')
+    make_user('reader').follower.create(author=user)
+    user.follower.create(author=author)
+    user.favorite.create(recipe=recipes[1])
+    user.shopping_cart.create(recipe=recipes[1])
+    new_author = make_user('new_author')
+    make_recipe(new_author, 'Рецепт нового автора')
+    update = {
+        key: value for key, value in recipe_payload.items()
+        if key != 'image'
+    }
+    bulk = [recipe.id for recipe in recipes[2:6]]
+    return {
+        'recipes_list': ('get', '/api/recipes/', None),
+        'recipes_retrieve': ('get', f'/api/recipes/{recipes[0].id}/', None),
+        'recipes_feed': ('get', '/api/recipes/feed/', None),
+        'recipes_create': ('post', '/api/recipes/', recipe_payload),
+        'recipes_update': ('patch', f'/api/recipes/{own.id}/', update),
+        'recipes_destroy': ('delete', f'/api/recipes/{own.id}/', None),
+        'favorite_add': (
+            'post', f'/api/recipes/{recipes[0].id}/favorite/', None
+        ),
+        'favorite_remove': (
+            'delete', f'/api/recipes/{recipes[1].id}/favorite/', None
+        ),
+        'shopping_cart_add': (
+            'post', f'/api/recipes/{recipes[0].id}/shopping_cart/', None
+        ),
+        'shopping_cart_remove': (
+            'delete', f'/api/recipes/{recipes[1].id}/shopping_cart/', None
+        ),
+        'shopping_cart_bulk': (
+            'post', '/api/recipes/shopping_cart/bulk/',
+            {'action': 'replace', 'recipes': bulk}
+        ),
+        'favorite_bulk': (
+            'post', '/api/recipes/favorite/bulk/',
+            {'action': 'add', 'recipes': bulk}
+        ),
+        'download_shopping_cart': (
+            'get', '/api/recipes/download_shopping_cart/', None
+        ),
+        'shopping_list': ('get', '/api/recipes/shopping_list/', None),
+        'subscribe': (
+            'post', f'/api/users/{new_author.id}/subscribe/', None
+        ),
+        'subscribe_delete': (
+            'delete', f'/api/users/{author.id}/subscribe/', None
+        ),
+        'subscriptions': ('get', '/api/users/subscriptions/', None),
+    }
+
+
+@pytest.mark.parametrize('name', EXPECTED_QUERIES)
+def test_cold_cache_query_counts(user_client, requests, name):
+    method, url, data = requests[name]
+    with CaptureQueriesContext(connection) as context:
+        response = getattr(user_client, method)(url, data, format='json')
+        if response.streaming:
+            b''.join(response.streaming_content)
+    assert response.status_code < 300, response.content
+    assert len(context) == EXPECTED_QUERIES[name]
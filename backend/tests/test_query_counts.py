@@ -0,0 +1,64 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .conftest import clear_caches
+
+pytestmark = pytest.mark.usefixtures('strict_budgets')
+
+LIST_URL = '/api/recipes/'
+
+
+def count_queries(client, url, params):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, params)
+    assert response.status_code == 200, response.content
+    return len(context), response.json()
+
+
+@pytest.fixture
+def recipes(author, user, make_recipe):
+    recipes = [make_recipe(author, f'Рецепт {index}') for index in range(32)]
+    for recipe in recipes[::3]:
+        user.favorite.create(recipe=recipe)
+    for recipe in recipes[::4]:
+        user.shopping_cart.create(recipe=recipe)
+    user.follower.create(author=author)
+    return recipes
+
+
+@pytest.mark.parametrize('url', (LIST_URL, '/api/recipes/feed/'))
+@pytest.mark.parametrize('warm', (False, True))
+def test_list_queries_do_not_grow_with_page_size(user_client, recipes,
+                                                 url, warm):
+    counts = {}
+    for limit in (2, 30):
+        if warm:
+            count_queries(user_client, url, {'limit': limit})
+        else:
+            clear_caches()
+        counts[limit], data = count_queries(
+            user_client, url, {'limit': limit}
+        )
+        assert len(data['results']) == limit
+    assert counts[2] == counts[30]
+
+
+@pytest.mark.parametrize('warm', (False, True))
+def test_anonymous_list_queries_do_not_grow_with_page_size(client, recipes,
+                                                           warm):
+    counts = {}
+    for limit in (2, 30):
+        if warm:
+            count_queries(client, LIST_URL, {'limit': limit})
+        else:
+            clear_caches()
+        counts[limit], _ = count_queries(client, LIST_URL, {'limit': limit})
+    assert counts[2] == counts[30]
+
+
+def test_warm_list_skips_related_queries(user_client, recipes):
+    cold, _ = count_queries(user_client, LIST_URL, {'limit': 6})
+    warm, _ = count_queries(user_client, LIST_URL, {'limit': 6})
+    assert warm < cold
+    assert warm == 2
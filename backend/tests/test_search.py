@@ -0,0 +1,50 @@
+import pytest
+
+# Поисковый вектор обновляется после коммита.
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+def search(client, text):
+    response = client.get('/api/recipes/', {'search': text})
+    assert response.status_code == 200
+    return [recipe['name'] for recipe in response.json()['results']]
+
+
+def test_search_by_name_text_and_ingredient(client, author, make_recipe,
+                                            ingredients):
+    make_recipe(author, 'Блины', {ingredients[0]: 100})
+    make_recipe(author, 'Каша', {ingredients[3]: 5})
+    assert search(client, 'блин') == ['Блины']
+    assert search(client, 'молоко') == ['Блины']
+    assert search(client, 'каша соль') == ['Каша']
+    assert search(client, 'каша молоко') == []
+
+
+def test_search_follows_model_save(client, author, make_recipe):
+    recipe = make_recipe(author, 'Суп')
+    assert search(client, 'пицца') == []
+    recipe.name = 'Пицца'
+    recipe.save()
+    assert search(client, 'пицца') == ['Пицца']
+    assert search(client, 'суп') == []
+
+
+def test_search_follows_api_update(client, author_client, author,
+                                   make_recipe, ingredients):
+    recipe = make_recipe(author, 'Суп', {ingredients[0]: 100})
+    assert search(client, 'молоко') == ['Суп']
+    response = author_client.patch(f'/api/recipes/{recipe.id}/', {
+        'ingredients': [{'id': ingredients[2].id, 'amount': 10}],
+    }, format='json')
+    assert response.status_code == 200
+    assert search(client, 'молоко') == []
+    assert search(client, 'сахар') == ['Суп']
+
+
+def test_new_recipe_is_searchable(client, author_client, recipe_payload):
+    response = author_client.post(
+        '/api/recipes/', recipe_payload, format='json'
+    )
+    assert response.status_code == 201
+    assert search(client, 'новый') == ['Новый рецепт']
+    assert search(client, 'сахар') == ['Новый рецепт']
@@ -0,0 +1,145 @@
+import pytest
+from django.core.management import call_command
+from django.db.models import Sum
+from recipes.models import RecipeIngredient, ShoppingCart, ShoppingListItem
+
+
+def expected_lists():
+    return {
+        (row['recipe__shopping_cart__author_id'], row['ingredient_id']):
+            row['total']
+        for row in RecipeIngredient.objects.filter(
+            recipe__shopping_cart__isnull=False
+        ).order_by().values(
+            'recipe__shopping_cart__author_id', 'ingredient_id'
+        ).annotate(total=Sum('amount'))
+    }
+
+
+def actual_lists():
+    return {
+        (item.user_id, item.ingredient_id): item.total_amount
+        for item in ShoppingListItem.objects.all()
+    }
+
+
+def assert_lists_match():
+    assert actual_lists() == expected_lists()
+
+
+@pytest.fixture
+def recipes(author, make_recipe, ingredients):
+    return [
+        make_recipe(
+            author, 'Блины', {ingredients[0]: 100, ingredients[1]: 200}
+        ),
+        make_recipe(author, 'Каша', {ingredients[0]: 50, ingredients[2]: 10}),
+        make_recipe(author, 'Суп', {ingredients[3]: 5}),
+    ]
+
+
+def test_cart_changes_update_list(user_client, user, recipes, ingredients):
+    for recipe in recipes[:2]:
+        user_client.post(f'/api/recipes/{recipe.id}/shopping_cart/')
+    assert_lists_match()
+    assert ShoppingListItem.objects.get(
+        user=user, ingredient=ingredients[0]
+    ).total_amount == 150
+    user_client.delete(f'/api/recipes/{recipes[0].id}/shopping_cart/')
+    assert_lists_match()
+    assert ShoppingListItem.objects.get(
+        user=user, ingredient=ingredients[0]
+    ).total_amount == 50
+    user_client.post('/api/recipes/shopping_cart/bulk/', {
+        'action': 'replace', 'recipes': [recipes[0].id, recipes[2].id],
+    }, format='json')
+    assert_lists_match()
+    assert not ShoppingListItem.objects.filter(
+        user=user, ingredient=ingredients[2]
+    ).exists()
+
+
+def test_removal_recounts_only_recipe_ingredients(user_client, user,
+                                                  recipes, ingredients):
+    for recipe in recipes:
+        user_client.post(f'/api/recipes/{recipe.id}/shopping_cart/')
+    ShoppingListItem.objects.filter(ingredient=ingredients[3]).update(
+        total_amount=1
+    )
+    user_client.delete(f'/api/recipes/{recipes[0].id}/shopping_cart/')
+    assert ShoppingListItem.objects.get(
+        user=user, ingredient=ingredients[3]
+    ).total_amount == 1
+    assert ShoppingListItem.objects.get(
+        user=user, ingredient=ingredients[0]
+    ).total_amount == 50
+
+
+def test_recipe_edits_update_list(user_client, author_client, recipes,
+                                  ingredients):
+    user_client.post(f'/api/recipes/{recipes[0].id}/shopping_cart/')
+    response = author_client.patch(f'/api/recipes/{recipes[0].id}/', {
+        'ingredients': [
+            {'id': ingredients[0].id, 'amount': 300},
+            {'id': ingredients[4].id, 'amount': 7},
+        ],
+    }, format='json')
+    assert response.status_code == 200
+    assert_lists_match()
+
+
+def test_direct_ingredient_edits_update_list(user_client, recipes,
+                                             ingredients):
+    user_client.post(f'/api/recipes/{recipes[0].id}/shopping_cart/')
+    item = RecipeIngredient.objects.get(
+        recipe=recipes[0], ingredient=ingredients[0]
+    )
+    item.amount = 999
+    item.save()
+    assert_lists_match()
+    item.ingredient = ingredients[4]
+    item.save()
+    assert_lists_match()
+    item.delete()
+    assert_lists_match()
+    RecipeIngredient.objects.create(
+        recipe=recipes[0], ingredient=ingredients[2], amount=3
+    )
+    assert_lists_match()
+
+
+def test_recipe_and_ingredient_deletion(user_client, make_user, recipes,
+                                        ingredients):
+    other = make_user('other')
+    for recipe in recipes:
+        user_client.post(f'/api/recipes/{recipe.id}/shopping_cart/')
+        ShoppingCart.objects.create(author=other, recipe=recipe)
+    recipes[1].delete()
+    assert_lists_match()
+    ingredients[3].delete()
+    assert_lists_match()
+
+
+def test_download_uses_materialized_list(user_client, recipes):
+    user_client.post(f'/api/recipes/{recipes[0].id}/shopping_cart/')
+    response = user_client.get('/api/recipes/download_shopping_cart/')
+    content = b''.join(response.streaming_content).decode()
+    assert 'молоко' in content
+    assert '100' in content
+
+
+def test_rebuild_command_restores_lists(user_client, recipes):
+    for recipe in recipes:
+        user_client.post(f'/api/recipes/{recipe.id}/shopping_cart/')
+    ShoppingListItem.objects.all().delete()
+    call_command('rebuild_shopping_lists', stdout=open('/dev/null', 'w'))
+    assert_lists_match()
+
+
+def test_seed_fills_shopping_lists(ingredients):
+    call_command(
+        'seed_benchmark', users=4, recipes=2, ingredients=2, tags=1,
+        follows=1, favorites=1, cart=2, stdout=open('/dev/null', 'w')
+    )
+    assert ShoppingListItem.objects.exists()
+    assert_lists_match()
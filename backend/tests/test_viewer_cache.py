@@ -0,0 +1,48 @@
+import pytest
+from api.relations import add_relation
+from api.viewer import VIEWER_KEY, Viewer
+from django.core.cache import cache
+from recipes.models import Favorite
+
+
+def get_recipe(client, recipe):
+    response = client.get(f'/api/recipes/{recipe.id}/')
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_flags_follow_changes(user_client, author, make_recipe):
+    recipe = make_recipe(author)
+    data = get_recipe(user_client, recipe)
+    assert not data['is_favorited']
+    assert not data['is_in_shopping_cart']
+    assert not data['author']['is_subscribed']
+    user_client.post(f'/api/recipes/{recipe.id}/favorite/')
+    user_client.post('/api/recipes/shopping_cart/bulk/', {
+        'action': 'add', 'recipes': [recipe.id],
+    }, format='json')
+    user_client.post(f'/api/users/{author.id}/subscribe/')
+    data = get_recipe(user_client, recipe)
+    assert data['is_favorited']
+    assert data['is_in_shopping_cart']
+    assert data['author']['is_subscribed']
+    user_client.delete(f'/api/recipes/{recipe.id}/favorite/')
+    user_client.delete(f'/api/users/{author.id}/subscribe/')
+    data = get_recipe(user_client, recipe)
+    assert not data['is_favorited']
+    assert not data['author']['is_subscribed']
+
+
+def test_invalidation_waits_for_commit(user, author, make_recipe,
+                                       django_capture_on_commit_callbacks):
+    recipe = make_recipe(author)
+    key = VIEWER_KEY.format(user.id, 'favorites')
+    assert Viewer(user).get_ids('favorites') == frozenset()
+    with django_capture_on_commit_callbacks() as callbacks:
+        add_relation(Favorite, 'author', user.id, 'recipe', recipe.id)
+        assert cache.get(key) == frozenset()
+    for callback in callbacks:
+        callback()
+    assert cache.get(key) is None
+    assert Viewer(user).get_ids('favorites') == {recipe.id}
@@ -36,7 +36,7 @@ class UserAdmin(UserAdmin):
 
     def favorite(self, obj):
         from django.utils.html import format_html
-        count = Favorite.objects.filter(author=obj).count()
+        count = obj.favorites_count
         url = (
             reverse("admin:recipes_favorite_changelist")
             + "?"
@@ -44,10 +44,11 @@ class UserAdmin(UserAdmin):
         )
         return format_html(f'<a href="{url}">{count} рецептов</a>')
     favorite.short_description = "В избранном:"
+    favorite.admin_order_field = 'favorites_count'
 
     def shopping_cart(self, obj):
         from django.utils.html import format_html
-        count = ShoppingCart.objects.filter(author=obj).count()
+        count = obj.shopping_cart_count
         url = (
             reverse("admin:recipes_shoppingcart_changelist")
             + "?"
@@ -55,6 +56,7 @@ class UserAdmin(UserAdmin):
         )
         return format_html(f'<a href="{url}">{count} рецептов</a>')
     shopping_cart.short_description = "В списке покупок:"
+    shopping_cart.admin_order_field = 'shopping_cart_count'
 
 
 class FollowAdmin(admin.ModelAdmin):
@@ -0,0 +1,22 @@
+from django.db import migrations
+from django.db.models import Min
+
+
+def dedupe_follows(apps, schema_editor):
+    """Оставляет по одной подписке (с наименьшим id) на пару."""
+    Follow = apps.get_model('users', 'Follow')
+    keep = Follow.objects.order_by().values('user', 'author').annotate(
+        keep_id=Min('id')
+    ).values('keep_id')
+    Follow.objects.exclude(id__in=keep).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_user_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_follows, migrations.RunPython.noop),
+    ]
@@ -6,7 +6,33 @@ from django.dispatch import receiver
 from rest_framework.authtoken.models import Token
 
 
-class User(AbstractUser):
+class DenormalizedFieldsMixin:
+    """Не даёт обычному save() перезаписать денормализованные поля.
+
+    Счётчики меняются только атомарными UPDATE с F(), поэтому
+    сохранение уже существующего объекта без update_fields пишет
+    все поля, кроме перечисленных в denormalized_fields: иначе
+    устаревший экземпляр вернул бы счётчикам старые значения.
+    """
+    denormalized_fields = ()
+
+    def save(self, *args, **kwargs):
+        if (
+            not args
+            and kwargs.get('update_fields') is None
+            and not kwargs.get('force_insert')
+            and not self._state.adding
+        ):
+            skipped = set(self.denormalized_fields)
+            skipped.update(self.get_deferred_fields())
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in skipped
+            ]
+        super().save(*args, **kwargs)
+
+
+class User(DenormalizedFieldsMixin, AbstractUser):
     """Модель пользователя."""
 
     username = models.CharField(max_length=150, unique=True,
@@ -20,6 +46,33 @@ class User(AbstractUser):
         default=True,
         verbose_name='Аккаунт разрешён'
     )
+    recipes_count = models.PositiveIntegerField(
+        verbose_name='Рецептов',
+        default=0,
+        editable=False
+    )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='Рецептов в избранном',
+        default=0,
+        editable=False
+    )
+    shopping_cart_count = models.PositiveIntegerField(
+        verbose_name='Рецептов в списке покупок',
+        default=0,
+        editable=False
+    )
+    followers_count = models.PositiveIntegerField(
+        verbose_name='Подписчиков',
+        default=0,
+        editable=False
+    )
+
+    denormalized_fields = (
+        'recipes_count',
+        'favorites_count',
+        'shopping_cart_count',
+        'followers_count',
+    )
 
     class Meta:
         verbose_name = 'Пользователь'
@@ -63,3 +116,9 @@ class Follow(models.Model):
         verbose_name = 'Подписка'
         verbose_name_plural = 'Подписки'
         ordering = ['user']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'],
+                name='unique_follow'
+            )
+        ]
@@ -1,8 +1,8 @@
+from api.viewer import get_viewer
 from django.contrib.auth import get_user_model
 from recipes.models import Recipe
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
-from users.models import Follow
 
 User = get_user_model()
 
@@ -30,12 +30,7 @@ class UserSerializer(serializers.ModelSerializer):
         ]
 
     def get_is_subscribed(self, obj):
-        request = self.context.get('request')
-        if request.user.is_anonymous:
-            return False
-        if Follow.objects.filter(user=request.user, author=obj).exists():
-            return True
-        return False
+        return get_viewer(self.context['request']).is_subscribed(obj.id)
 
 
 class CreateUserSerializer(serializers.ModelSerializer):
@@ -78,7 +73,6 @@ class RecipesMiniSerializers(serializers.ModelSerializer):
 
 class UserWithRecipesSerializer(UserSerializer):
     """Сериализатор для получения данных в подписке."""
-    is_subscribed = serializers.SerializerMethodField()
     recipes = serializers.SerializerMethodField()
     recipes_count = serializers.SerializerMethodField()
 
@@ -102,17 +96,12 @@ class UserWithRecipesSerializer(UserSerializer):
             'last_name': {'read_only': True},
         }
 
-    def get_is_subscribed(self, obj):
-        request = self.context.get('request')
-        if request.user.is_anonymous:
-            return False
-        if hasattr(obj, 'author'):
-            return Follow.objects.filter(
-                user=request.user, author=obj.author).exists()
-        return Follow.objects.filter(
-            user=request.user, author=obj).exists()
-
     def get_recipes(self, obj):
+        recipes_by_author = self.context.get('recipes_by_author')
+        if recipes_by_author is not None:
+            return RecipesMiniSerializers(
+                recipes_by_author.get(obj.id, ()), many=True
+            ).data
         request = self.context.get('request')
         limit = request.query_params.get('recipes_limit')
         recipes = obj.recipes.only('id', 'name', 'image', 'cooking_time')
@@ -121,43 +110,4 @@ class UserWithRecipesSerializer(UserSerializer):
         return RecipesMiniSerializers(recipes, many=True).data
 
     def get_recipes_count(self, obj):
-        user = obj
-        return Recipe.objects.filter(author=user).count()
-
-
-class SubscriptionSerializer(serializers.ModelSerializer):
-    """Сериализатор подписок."""
-    class Meta:
-        model = Follow
-        fields = ('user', 'author')
-
-    def validate(self, data):
-        user = data['user']
-        author = data['author']
-        if user == author:
-            raise serializers.ValidationError(
-                'Подписка на себя невозможна.')
-        action = self.context['action']
-        user_in_subscription = Follow.objects.filter(
-            user=user,
-            author=author
-        )
-        if action == 'subscribe':
-            if user_in_subscription:
-                raise serializers.ValidationError(
-                    'Вы уже подписаны на данного пользователя.')
-        elif action == 'unsubscribe':
-            if not user_in_subscription:
-                raise serializers.ValidationError(
-                    'Данного пользователя нет в подписках.')
-            user_in_subscription.delete()
-        return data
-
-    def to_representation(self, instance):
-        authors = UserWithRecipesSerializer(
-            instance.author,
-            context={
-                'request': self.context.get('request')
-            }
-        )
-        return authors.data
+        return obj.recipes_count
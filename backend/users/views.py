@@ -1,8 +1,17 @@
-from api.paginator import SixPagination
+from collections import defaultdict
+
+from api.paginator import (CursorPaginationMixin, SixPagination,
+                           UserCursorPagination)
 from api.permissions import UserPermission
+from api.relations import (add_relation, get_target_id, relation_error,
+                           remove_relation)
 from django.contrib.auth.hashers import check_password
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from djoser.views import TokenCreateView, UserViewSet
+from recipes.models import Recipe
 from rest_framework import permissions, status
 from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAuthenticated
@@ -10,18 +19,56 @@ from rest_framework.response import Response
 from rest_framework.status import HTTP_400_BAD_REQUEST
 
 from .models import Follow, User
-from .serializers import (PasswordSerializer, SubscriptionSerializer,
-                          UserSerializer, UserWithRecipesSerializer)
+from .serializers import (PasswordSerializer, UserSerializer,
+                          UserWithRecipesSerializer)
 
 USER_BLOCKED = 'Аккаунт не активен!'
 
 
-class UserViewSet(UserViewSet):
+def get_recipes_preview(authors, limit=None):
+    """Последние рецепты авторов одним запросом.
+
+    При заданном limit каждый автор ограничивается оконной функцией
+    ROW_NUMBER() по убыванию даты публикации.
+    """
+    recipes = Recipe.objects.filter(
+        author__in=authors
+    ).only('id', 'name', 'image', 'cooking_time', 'author_id')
+    if limit is not None and str(limit).isdigit():
+        ranked = recipes.annotate(row_number=Window(
+            expression=RowNumber(),
+            partition_by=F('author_id'),
+            order_by=(F('pub_date').desc(), F('id').desc()),
+        )).order_by()
+        sql, params = ranked.query.sql_with_params()
+        recipes = Recipe.objects.raw(
+            f'SELECT * FROM ({sql}) ranked WHERE row_number <= %s '
+            'ORDER BY author_id, row_number',
+            (*params, int(limit))
+        )
+    else:
+        recipes = recipes.order_by('-pub_date', '-id')
+    recipes_by_author = defaultdict(list)
+    for recipe in recipes:
+        recipes_by_author[recipe.author_id].append(recipe)
+    return recipes_by_author
+
+
+class UserViewSet(CursorPaginationMixin, UserViewSet):
     """API пользователя."""
     queryset = User.objects.all().prefetch_related('recipes')
     serializer_class = UserSerializer
     pagination_class = SixPagination
+    cursor_pagination_class = UserCursorPagination
     permission_classes = (UserPermission,)
+    query_budget = {
+        'list': 5,
+        'retrieve': 4,
+        'me': 3,
+        'subscriptions': 6,
+        'subscribe': 10,
+        'subscribe_delete': 6,
+    }
 
     @action(
         detail=False,
@@ -49,7 +96,7 @@ class UserViewSet(UserViewSet):
         )
         if check_password(password, user.password):
             user.set_password(new_password)
-            user.save()
+            user.save(update_fields=['password'])
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response(status=status.HTTP_400_BAD_REQUEST)
 
@@ -64,24 +111,21 @@ class UserViewSet(UserViewSet):
             id__in=Follow.objects.filter(user=request.user).values_list(
                 'author_id', flat=True
             )
-        )
+        ).order_by('id')
         page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = UserWithRecipesSerializer(
-                page,
-                many=True,
-                context={
-                    'request': request,
-                },
-            )
-            return self.get_paginated_response(serializer.data)
+        authors = list(queryset) if page is None else page
         serializer = UserWithRecipesSerializer(
-            queryset,
+            authors,
             many=True,
             context={
                 'request': request,
+                'recipes_by_author': get_recipes_preview(
+                    authors, request.query_params.get('recipes_limit')
+                ),
             },
         )
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
         return Response(serializer.data)
 
 
@@ -105,22 +149,28 @@ class SubscriptionViewSet(UserViewSet):
         permission_classes=[IsAuthenticated]
     )
     def subscribe(self, request, id):
-        serializer = SubscriptionSerializer(
-            data={'author': id, 'user': request.user.id},
-            context={'request': self.request, 'action': 'subscribe'}
-        )
-        serializer.is_valid(raise_exception=True)
-        serializer.save(user=request.user)
-        return Response(
-            serializer.data, status=status.HTTP_201_CREATED
-        )
+        author_id = get_target_id(id)
+        if author_id == request.user.id:
+            raise relation_error('Подписка на себя невозможна.')
+        if add_relation(Follow, 'user', request.user.id, 'author', author_id):
+            serializer = UserWithRecipesSerializer(
+                User.objects.get(pk=author_id),
+                context={'request': request}
+            )
+            return Response(
+                serializer.data, status=status.HTTP_201_CREATED
+            )
+        if not User.objects.filter(pk=author_id).exists():
+            raise Http404
+        raise relation_error('Вы уже подписаны на данного пользователя.')
 
     @subscribe.mapping.delete
     def subscribe_delete(self, request, id):
-        get_object_or_404(User, pk=id)
-        serializer = SubscriptionSerializer(
-            data={'author': id, 'user': request.user.id},
-            context={'request': self.request, 'action': 'unsubscribe'}
-        )
-        serializer.is_valid(raise_exception=True)
-        return Response(status=status.HTTP_204_NO_CONTENT)
+        author_id = get_target_id(id)
+        if remove_relation(
+            Follow, 'user', request.user.id, 'author', author_id
+        ):
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        if not User.objects.filter(pk=author_id).exists():
+            raise Http404
+        raise relation_error('Данного пользователя нет в подписках.')